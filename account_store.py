@@ -0,0 +1,280 @@
+"""Account storage backends for Trivia Turbo logins."""
+import json  # Import the json library for handling JSON data
+import os  # Import the os library for interacting with the operating system
+import sqlite3  # Import the sqlite3 library for the indexed account database
+import threading  # Import the threading library to guard accounts shared with the writer thread
+from background_writer import get_writer  # Import the shared background writer
+
+
+ACCOUNT_BACKEND = "sqlite"  # Backend used by open_account_store ('sqlite' or 'json')
+ACCOUNT_JSON_FILE = "account_data.json"  # File the JSON backend stores accounts in
+ACCOUNT_DATABASE_FILE = "account_data.db"  # File the SQLite backend stores accounts in
+
+
+class JsonAccountStore:
+    """Accounts kept in one JSON file that is read in full and rewritten on every change."""
+
+    def __init__(self, path=ACCOUNT_JSON_FILE, writer=None):
+        """
+        Initialize a JsonAccountStore instance. The file isn't read until it is first needed.
+
+        Args:
+            path (str): The path of the JSON file.
+            writer (BackgroundWriter): The writer that saves the file, or None for the shared one.
+        """
+        self.path = path  # Path of the JSON file
+        self.writer = writer  # Writer that saves the file off the UI thread
+        self.accounts = None  # Passwords by username, once loaded
+        self.saved_accounts = None  # Passwords as last written, kept by the writer thread
+
+    def load(self):
+        """
+        Load the accounts from the file if they haven't been loaded yet.
+
+        Returns:
+            dict: The passwords by username.
+        """
+        if self.accounts is None:
+            if os.path.exists(self.path):  # Check if the account data file exists
+                with open(self.path, "r") as file:
+                    self.accounts = json.load(file)  # Load the accounts from the JSON file
+            else:
+                self.accounts = {}  # Start with no accounts
+        return self.accounts
+
+    def __contains__(self, username):
+        """
+        Check if an account exists.
+
+        Args:
+            username (str): The username of the account.
+
+        Returns:
+            bool: True if the account exists, False otherwise.
+        """
+        return username in self.load()
+
+    def __len__(self):
+        """
+        Get the number of accounts.
+
+        Returns:
+            int: The number of accounts.
+        """
+        return len(self.load())
+
+    def check(self, username, password):
+        """
+        Check a username and password against the stored accounts.
+
+        Args:
+            username (str): The username of the account.
+            password (str): The password entered for the account.
+
+        Returns:
+            bool: True if the account exists and the password matches, False otherwise.
+        """
+        accounts = self.load()
+        return username in accounts and accounts[username] == password
+
+    def add(self, username, password):
+        """
+        Add an account and queue it to be written to the file in the background.
+
+        Args:
+            username (str): The username of the account.
+            password (str): The password of the account.
+        """
+        self.load()[username] = password
+        if self.writer is None:
+            self.writer = get_writer()
+        self.writer.submit(self, username, password)  # Only the new account is handed to the writer
+
+    def write_batch(self, items):
+        """
+        Rewrite the file with the queued accounts added. Called on the writer thread.
+
+        The writer keeps its own copy of the accounts, read from the file the first time,
+        so the UI thread never has to copy them.
+
+        Args:
+            items (list): The queued (username, password) pairs.
+        """
+        if self.saved_accounts is None:
+            if os.path.exists(self.path):
+                with open(self.path, "r") as file:
+                    self.saved_accounts = json.load(file)
+            else:
+                self.saved_accounts = {}
+        self.saved_accounts.update(items)
+        accounts = self.saved_accounts
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(accounts, file)
+            file.flush()
+            os.fsync(file.fileno())  # Make sure the data is on disk before replacing the old file
+        os.replace(temporary_path, self.path)
+
+    def close(self):
+        """Wait for queued writes and forget the loaded accounts."""
+        if self.writer is not None:
+            self.writer.flush()
+        self.accounts = None
+        self.saved_accounts = None
+
+
+class SqliteAccountStore:
+    """Accounts kept in an SQLite table indexed by username, written one row at a time."""
+
+    def __init__(self, path=ACCOUNT_DATABASE_FILE, import_from=ACCOUNT_JSON_FILE, writer=None):
+        """
+        Initialize a SqliteAccountStore instance. The database isn't opened until it is first needed.
+
+        Args:
+            path (str): The path of the database file.
+            import_from (str): A JSON account file to copy accounts from when the database is
+                first created, or None to start empty.
+            writer (BackgroundWriter): The writer that saves new accounts, or None for the shared one.
+        """
+        self.path = path  # Path of the database file
+        self.import_from = import_from  # JSON file to import when creating the database
+        self.writer = writer  # Writer that saves new accounts off the UI thread
+        self.connection = None  # Open database connection, once connected
+        self.write_connection = None  # Connection used by the writer thread
+        self.unsaved = {}  # New accounts queued but not yet written, by username
+        self.unsaved_lock = threading.Lock()  # Held while accounts move from unsaved to the database
+
+    def connect(self):
+        """
+        Open the database if it isn't open yet, creating and filling it on first use.
+
+        Returns:
+            sqlite3.Connection: The open database connection.
+        """
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path)
+            # Use SQLite's default rollback journal, even for a database an older version left in
+            # WAL mode: WAL needs shared memory, which network drives don't support. Reads wait
+            # for the writer's short transactions instead of reading alongside them.
+            self.connection.execute("PRAGMA journal_mode=DELETE")
+            with self.connection:
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS accounts (username TEXT PRIMARY KEY, password TEXT NOT NULL)"
+                )
+            self.import_json()
+        return self.connection
+
+    def import_json(self):
+        """Copy the accounts from the old JSON file into a new, empty database."""
+        if not self.import_from or not os.path.exists(self.import_from):
+            return
+        if self.connection.execute("SELECT 1 FROM accounts LIMIT 1").fetchone():
+            return  # Only import into an empty database
+
+        with open(self.import_from, "r") as file:
+            accounts = json.load(file)
+        with self.connection:
+            self.connection.executemany("INSERT INTO accounts VALUES (?, ?)", accounts.items())
+
+    def __contains__(self, username):
+        """
+        Check if an account exists.
+
+        Args:
+            username (str): The username of the account.
+
+        Returns:
+            bool: True if the account exists, False otherwise.
+        """
+        if username in self.unsaved:
+            return True
+        query = "SELECT 1 FROM accounts WHERE username = ?"
+        return self.connect().execute(query, (username,)).fetchone() is not None
+
+    def __len__(self):
+        """
+        Get the number of accounts.
+
+        Returns:
+            int: The number of accounts.
+        """
+        connection = self.connect()
+        with self.unsaved_lock:  # Don't count an account the writer has saved but not yet forgotten
+            saved = connection.execute("SELECT COUNT(*) FROM accounts").fetchone()[0]
+            return saved + len(self.unsaved)
+
+    def check(self, username, password):
+        """
+        Check a username and password against the stored accounts.
+
+        Args:
+            username (str): The username of the account.
+            password (str): The password entered for the account.
+
+        Returns:
+            bool: True if the account exists and the password matches, False otherwise.
+        """
+        stored = self.unsaved.get(username)  # One read, as the writer thread may forget it at any time
+        if stored is not None:
+            return stored == password
+        query = "SELECT password FROM accounts WHERE username = ?"
+        row = self.connect().execute(query, (username,)).fetchone()
+        return row is not None and row[0] == password
+
+    def add(self, username, password):
+        """
+        Add an account and queue it to be written in the background.
+
+        Args:
+            username (str): The username of the account.
+            password (str): The password of the account.
+        """
+        self.connect()  # Make sure the table exists before the writer uses it
+        self.unsaved[username] = password
+        if self.writer is None:
+            self.writer = get_writer()
+        self.writer.submit(self, username, password)
+
+    def write_batch(self, items):
+        """
+        Write a batch of queued accounts in one transaction. Called on the writer thread.
+
+        Args:
+            items (list): The queued (username, password) pairs.
+        """
+        if self.write_connection is None:
+            # SQLite connections belong to the thread that opened them
+            self.write_connection = sqlite3.connect(self.path)
+        with self.unsaved_lock:
+            with self.write_connection:
+                self.write_connection.executemany("INSERT OR REPLACE INTO accounts VALUES (?, ?)", items)
+
+            # The accounts can be read from the database now
+            for username, password in items:
+                if self.unsaved.get(username) == password:
+                    self.unsaved.pop(username, None)
+
+    def close(self):
+        """Wait for queued writes and close the database connection."""
+        if self.writer is not None:
+            self.writer.flush()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def open_account_store(backend=ACCOUNT_BACKEND):
+    """
+    Create the account store for a backend.
+
+    Args:
+        backend (str): The backend to use ('sqlite' or 'json').
+
+    Returns:
+        SqliteAccountStore or JsonAccountStore: The account store.
+    """
+    if backend == "sqlite":
+        return SqliteAccountStore()
+    elif backend == "json":
+        return JsonAccountStore()
+    raise ValueError(f"Unknown account backend: {backend}")
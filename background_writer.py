@@ -0,0 +1,112 @@
+"""Background thread that does disk writes for the UI thread."""
+import atexit  # Import the atexit library to flush writes when the program exits
+import threading  # Import the threading library for the writer thread
+import traceback  # Import the traceback library to report failed writes
+
+
+BATCH_DELAY = 0.05  # Seconds the writer waits after a write arrives, to batch it with others
+
+
+class BackgroundWriter:
+    """Writer thread that takes queued writes from the UI thread, coalescing and batching them."""
+
+    def __init__(self, batch_delay=BATCH_DELAY):
+        """
+        Initialize a BackgroundWriter instance and start its thread.
+
+        Args:
+            batch_delay (float): The seconds to wait after a write arrives before writing.
+        """
+        self.batch_delay = batch_delay  # Time to wait for more writes before writing a batch
+        self.pending = {}  # Values waiting to be written, by (sink, key)
+        self.condition = threading.Condition()  # Guards pending and the counters below
+        self.submitted = 0  # Number of writes queued so far
+        self.written = 0  # Number of queued writes that have been written
+        self.flushing = False  # Whether someone is waiting for the queue to be written
+        self.closed = False  # Whether the writer has been closed
+        self.thread = threading.Thread(target=self.run, name="background writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)  # Write anything still queued when the program exits
+
+    def submit(self, sink, key, value):
+        """
+        Queue a value to be written. This only takes a lock, so it is safe on the UI thread.
+
+        A newer value for the same sink and key replaces one that hasn't been written yet.
+
+        Args:
+            sink: The object that writes the value, with a write_batch(items) method that
+                is called on the writer thread with a list of (key, value) pairs.
+            key: The key the value is written under.
+            value: The value to write.
+        """
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("The background writer has been closed")
+            self.pending.pop((sink, key), None)  # Coalesce with an unwritten value for the same key
+            self.pending[(sink, key)] = value
+            self.submitted += 1
+            self.condition.notify_all()
+
+    def run(self):
+        """Write queued values in batches until the writer is closed."""
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending or self.closed)
+                if not self.pending:
+                    self.condition.notify_all()  # Wake anyone flushing a closed writer
+                    return  # Closed with nothing left to write
+
+                # Give other writes a moment to arrive so they share the batch
+                self.condition.wait_for(lambda: self.flushing or self.closed, timeout=self.batch_delay)
+                batch, self.pending = self.pending, {}
+                batch_end = self.submitted
+
+            # Group the batch by sink so each sink writes and syncs once
+            batches = {}
+            for (sink, key), value in batch.items():
+                batches.setdefault(sink, []).append((key, value))
+            for sink, items in batches.items():
+                try:
+                    sink.write_batch(items)
+                except Exception:
+                    traceback.print_exc()  # Report the failure but keep the writer running
+
+            with self.condition:
+                self.written = batch_end
+                self.condition.notify_all()
+
+    def flush(self):
+        """Wait until every write queued so far has been written."""
+        with self.condition:
+            target = self.submitted
+            self.flushing = True
+            self.condition.notify_all()
+            self.condition.wait_for(lambda: self.written >= target or not self.thread.is_alive())
+            self.flushing = False
+
+    def close(self):
+        """Write everything still queued and stop the writer thread."""
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+
+
+# Shared writer for the whole process, started on first use
+writer = None
+
+
+def get_writer():
+    """
+    Get the shared background writer, starting it if needed.
+
+    Returns:
+        BackgroundWriter: The shared writer.
+    """
+    global writer
+    if writer is None:
+        writer = BackgroundWriter()
+    return writer
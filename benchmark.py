@@ -0,0 +1,384 @@
+"""Benchmarks for the per-frame and per-answer hot paths of Trivia Turbo.
+
+Run with:
+    python benchmark.py                          Print the results as JSON
+    python benchmark.py --save results.json      Save the results as a baseline
+    python benchmark.py --baseline results.json  Compare against a saved baseline
+    python benchmark.py --replay replays/*.ttr   Also time replaying saved matches
+
+The game runs on the fake_tk backend unless --backend tk is given, so no display is needed.
+Comparing against a baseline exits with status 1 if any result is more than --tolerance worse.
+"""
+import argparse  # Import the argparse library for command line options
+import importlib.util  # Import importlib to load the game script, whose name has a space in it
+import json  # Import the json library for reading and writing results
+import os  # Import the os library for environment settings and file paths
+import platform  # Import the platform library to record the machine the results came from
+import random  # Import the random library for generating random numbers
+import statistics  # Import the statistics library for medians and percentiles
+import sys  # Import the sys library for the exit status
+import tempfile  # Import the tempfile library for account files used by the benchmarks
+import time  # Import the time library for timing
+
+
+GAME_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ver 12.py")  # Game to benchmark
+FRAME_TIME = 0.04  # Elapsed time in seconds passed to frame updates
+ITEM_COUNTS = (0, 100, 1000)  # Extra canvas items added for the frame benchmarks
+NPC_COUNTS = (6, 50, 200)  # NPC pool sizes for the NPC movement benchmark
+ROAD_RENDERINGS = ("dash", "items")  # Ways of drawing the road lines and finish line
+ROSTER_SIZES = (10, 100, 1000, 10000, 100000)  # Numbers of accounts for the login benchmarks
+DIFFICULTIES = ("easy", "medium", "hard")  # Difficulty levels for the question benchmarks
+TOLERANCE = 0.25  # Fraction a result may get worse by before it counts as a regression
+
+
+def load_game(backend):
+    """
+    Import the game script as a module.
+
+    Args:
+        backend (str): The tkinter backend to use ('fake' or 'tk').
+
+    Returns:
+        module: The game module.
+    """
+    if backend == "fake":
+        os.environ["TRIVIA_TURBO_BACKEND"] = "fake"
+    sys.path.insert(0, os.path.dirname(GAME_SCRIPT))
+    spec = importlib.util.spec_from_file_location("trivia_turbo", GAME_SCRIPT)
+    game_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(game_module)
+    return game_module
+
+
+def time_calls(function, repeats):
+    """
+    Time a function over a number of calls.
+
+    Args:
+        function (callable): The function to call, with no arguments.
+        repeats (int): The number of calls.
+
+    Returns:
+        list: The time in microseconds each call took.
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def percentile(timings, fraction):
+    """
+    Get a percentile of some timings.
+
+    Args:
+        timings (list): The timings.
+        fraction (float): The percentile as a fraction, such as 0.95.
+
+    Returns:
+        float: The timing at the percentile.
+    """
+    ordered = sorted(timings)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def new_game(game_module, npc_pool_size=None, road_rendering=None):
+    """
+    Create a game with its scene loaded and its frame clock stopped, ready to benchmark.
+
+    Args:
+        game_module (module): The game module.
+        npc_pool_size (int): The NPC pool size, or None for the default.
+        road_rendering (str): The road rendering ('dash' or 'items'), or None for the default.
+
+    Returns:
+        Game: The game.
+    """
+    options = {} if npc_pool_size is None else {"npc_pool_size": npc_pool_size}
+    if road_rendering is not None:
+        options["road_rendering"] = road_rendering
+    game = game_module.Game(deferred_startup=False, **options)
+    game.update()
+    game.scheduler.stop()  # Frame updates are called directly by the benchmarks
+    return game
+
+
+def count_calls(game, function):
+    """
+    Count the widget calls, like Tcl round trips, a function makes. Only works on the fake backend.
+
+    Args:
+        game (Game): The game.
+        function (callable): The function to call, with no arguments.
+
+    Returns:
+        int: The number of calls, or None on the real tkinter backend.
+    """
+    if not hasattr(game, "call_count"):
+        return None
+    before = game.call_count
+    function()
+    return game.call_count - before
+
+
+def benchmark_frames(game_module, repeats, results):
+    """
+    Benchmark the road, NPC and finish line frame updates as the canvas grows.
+
+    Args:
+        game_module (module): The game module.
+        repeats (int): The number of frames to time.
+        results (dict): The results to add to.
+    """
+    for road_rendering in ROAD_RENDERINGS:
+        game = new_game(game_module, road_rendering=road_rendering)
+        results[f"scene_items.{road_rendering}"] = len(game.right_canvas.find_withtag("all"))  # Items drawn on the road
+
+        timings = time_calls(lambda: game.move_lines(FRAME_TIME), repeats)
+        results[f"move_lines.{road_rendering}"] = statistics.median(timings)
+        game.destroy()
+
+    for item_count in ITEM_COUNTS:
+        game = new_game(game_module)
+        for _ in range(item_count):
+            game.right_canvas.create_rectangle(0, 0, 1, 1, tags="clutter")  # Unrelated items on the canvas
+
+        timings = time_calls(lambda: game.move_lines(FRAME_TIME), repeats)
+        results[f"move_lines.items_{item_count}"] = statistics.median(timings)
+        calls = count_calls(game, lambda: game.move_lines(FRAME_TIME))
+        if calls is not None:
+            results[f"move_lines.items_{item_count}.calls"] = calls
+
+        timings = []
+        for _ in range(max(repeats // 20, 1)):
+            game.end_game_animation()  # Put the finish line back at the top
+            game.scheduler.unregister("animate_finish_line")
+            timings += time_calls(lambda: game.animate_finish_line(FRAME_TIME), 20)
+        results[f"animate_finish_line.items_{item_count}"] = statistics.median(timings)
+        game.destroy()
+
+    for npc_count in NPC_COUNTS:
+        game = new_game(game_module, npc_pool_size=npc_count)
+        for index in range(npc_count):
+            car = game.right_canvas.create_image(125, 900 - index * 50, tag="car")
+            game.add_npc(car)
+
+        timings = time_calls(lambda: game.npc_movement(FRAME_TIME), repeats)
+        results[f"npc_movement.npcs_{npc_count}"] = statistics.median(timings)
+        calls = count_calls(game, lambda: game.npc_movement(FRAME_TIME))
+        if calls is not None:
+            results[f"npc_movement.npcs_{npc_count}.calls"] = calls
+        game.destroy()
+
+
+def benchmark_questions(game_module, repeats, results):
+    """
+    Benchmark question generation for each difficulty, in the engine and through a Player.
+
+    Args:
+        game_module (module): The game module.
+        repeats (int): The number of questions to time.
+        results (dict): The results to add to.
+    """
+    for difficulty in DIFFICULTIES:
+        match = game_module.Match(difficulty, rng=random.Random(1))
+        player = match.add_player("Player 1")
+        start = time.perf_counter()
+        for _ in range(repeats):
+            match.generate_question(player)
+        results[f"match.generate_question.{difficulty}.per_second"] = repeats / (time.perf_counter() - start)
+
+        game = new_game(game_module)
+        game.start_game(difficulty)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            game.players[0].generate_question()
+        results[f"player.generate_question.{difficulty}.per_second"] = repeats / (time.perf_counter() - start)
+        game.destroy()
+
+
+def benchmark_answers(game_module, repeats, results):
+    """
+    Benchmark the latency of Player.check_answer, starting a new game whenever one is won.
+
+    Args:
+        game_module (module): The game module.
+        repeats (int): The number of answers to time.
+        results (dict): The results to add to.
+    """
+    game = new_game(game_module)
+    rng = random.Random(1)
+    game.start_game("hard")
+    game.players[0].generate_question()
+    timings = []
+    for _ in range(repeats):
+        if game.match.winner:
+            game.start_game("hard")
+            game.players[0].generate_question()
+        player = game.players[0]
+        index = rng.randrange(len(player.state.answers))
+        timings += time_calls(lambda: player.check_answer(index), 1)
+        game.view.flush()  # Send the label changes, as the frame clock would
+    results["check_answer.median"] = statistics.median(timings)
+    results["check_answer.p95"] = percentile(timings, 0.95)
+    game.destroy()
+
+
+def benchmark_replays(replay_paths, repeats, results):
+    """
+    Benchmark replaying match logs, from a simulated match and from any saved replays.
+
+    Args:
+        replay_paths (list): The paths of saved replay logs, such as from real classes.
+        repeats (int): The number of times to replay each log.
+        results (dict): The results to add to.
+    """
+    import replay_log  # Imported here so the game module has set up the import path
+    from trivia_engine import simulate_match
+
+    logs = {"simulated": replay_log.ReplayLog()}
+    simulate_match("hard", player_count=4, rng=random.Random(1), log=logs["simulated"])
+    for path in replay_paths:
+        logs[os.path.basename(path)] = replay_log.ReplayLog.load(path)
+
+    for name, log in logs.items():
+        start = time.perf_counter()
+        for _ in range(repeats):
+            replay_log.replay(log)
+        results[f"replay.{name}.events_per_second"] = len(log) * repeats / (time.perf_counter() - start)
+
+
+def benchmark_logins(game_module, roster_sizes, repeats, results):
+    """
+    Benchmark check_login and create_login at different numbers of accounts, for each backend.
+
+    Args:
+        game_module (module): The game module.
+        roster_sizes (tuple): The numbers of accounts to test with.
+        repeats (int): The number of logins and signups to time.
+        results (dict): The results to add to.
+    """
+    import account_store  # Imported here so the game module has set up the import path
+    from background_writer import BackgroundWriter
+
+    game = new_game(game_module)
+    original_accounts = game_module.accounts
+    with tempfile.TemporaryDirectory() as directory:
+        for size in roster_sizes:
+            roster = {f"student{number}": "password" for number in range(size)}
+            for backend in ("sqlite", "json"):
+                writer = BackgroundWriter()
+                if backend == "sqlite":
+                    path = os.path.join(directory, f"accounts_{size}.db")
+                    store = account_store.SqliteAccountStore(path, import_from=None, writer=writer)
+                    with store.connect():
+                        store.connection.executemany("INSERT INTO accounts VALUES (?, ?)", roster.items())
+                else:
+                    path = os.path.join(directory, f"accounts_{size}.json")
+                    with open(path, "w") as file:
+                        json.dump(roster, file)
+                    store = account_store.JsonAccountStore(path, writer=writer)
+                store.close()  # Measure the first login from a cold start
+                game_module.accounts = store
+
+                def log_in(username):
+                    game.username_entry.delete(0, "end")
+                    game.username_entry.insert(0, username)
+                    game.password_entry.delete(0, "end")
+                    game.password_entry.insert(0, "password")
+                    game.check_login()
+
+                def sign_up(username):
+                    game.username_entry.delete(0, "end")
+                    game.username_entry.insert(0, username)
+                    game.create_login()
+
+                first_login = time_calls(lambda: log_in("student0"), 1)[0]
+                login_timings = [time_calls(lambda: log_in(f"student{number % size}"), 1)[0] for number in range(repeats)]
+                names = ("".join(chr(97 + int(digit)) for digit in f"{number:06d}") for number in range(repeats))
+                signup_timings = [time_calls(lambda: sign_up(f"newstudent{name}"), 1)[0] for name in names]
+                store.close()
+                writer.close()
+
+                results[f"check_login.{backend}.accounts_{size}.first"] = first_login
+                results[f"check_login.{backend}.accounts_{size}"] = statistics.median(login_timings)
+                results[f"create_login.{backend}.accounts_{size}"] = statistics.median(signup_timings)
+    game_module.accounts = original_accounts
+    game.destroy()
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results against a baseline.
+
+    Results ending in 'per_second' are better when higher; every other result is a time or
+    a call count, which is better when lower.
+
+    Args:
+        results (dict): The new results.
+        baseline (dict): The baseline results.
+        tolerance (float): The fraction a result may get worse by before it is a regression.
+
+    Returns:
+        list: Descriptions of the regressions.
+    """
+    regressions = []
+    for name, old_value in baseline.items():
+        new_value = results.get(name)
+        if new_value is None or not old_value:
+            continue
+        if name.endswith("per_second"):
+            change = (old_value - new_value) / old_value  # Fewer per second is worse
+        else:
+            change = (new_value - old_value) / old_value  # More time or calls is worse
+        if change > tolerance:
+            regressions.append(f"{name}: {old_value:.2f} -> {new_value:.2f} ({change:+.0%} worse)")
+    return regressions
+
+
+def main():
+    """Run the benchmarks and save or compare the results."""
+    parser = argparse.ArgumentParser(description="Benchmark the Trivia Turbo hot paths.")
+    parser.add_argument("--backend", choices=("fake", "tk"), default="fake", help="tkinter backend to run on")
+    parser.add_argument("--repeats", type=int, default=500, help="number of timed calls per benchmark")
+    parser.add_argument("--quick", action="store_true", help="skip the largest account rosters")
+    parser.add_argument("--save", help="file to save the results to")
+    parser.add_argument("--baseline", help="file of baseline results to compare against")
+    parser.add_argument("--replay", nargs="*", default=[], help="saved replay logs to time replaying")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="fraction a result may get worse by")
+    args = parser.parse_args()
+
+    game_module = load_game(args.backend)
+    results = {}
+    benchmark_frames(game_module, args.repeats, results)
+    benchmark_questions(game_module, args.repeats * 10, results)
+    benchmark_answers(game_module, args.repeats, results)
+    benchmark_replays(args.replay, max(args.repeats // 10, 1), results)
+    roster_sizes = ROSTER_SIZES[:3] if args.quick else ROSTER_SIZES
+    benchmark_logins(game_module, roster_sizes, min(args.repeats, 50), results)
+
+    report = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "backend": args.backend},
+        "units": "microseconds per call, widget calls per frame, or questions per second",
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
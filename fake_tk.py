@@ -0,0 +1,757 @@
+"""In-memory stand-in for the parts of tkinter the game uses, driven by a virtual clock."""
+import heapq  # Import the heapq library for the queue of timed callbacks
+import os  # Import the os library for checking image files
+import struct  # Import the struct library for reading PNG sizes
+
+
+# Anchor constants, matching tkinter
+CENTER = "center"
+NW = "nw"
+
+# The root window that owns the virtual clock, set when a Tk is created
+default_root = None
+
+
+class TclError(Exception):
+    """Error raised for calls tkinter would reject."""
+
+
+def monotonic():
+    """
+    Get the virtual time of the root window, in place of time.monotonic.
+
+    Returns:
+        float: The virtual time in seconds.
+    """
+    return default_root.virtual_time if default_root is not None else 0.0
+
+
+class Event:
+    """Event passed to bound callbacks."""
+
+    def __init__(self, widget, keysym="", char=""):
+        """
+        Initialize an Event instance.
+
+        Args:
+            widget (Widget): The widget the event happened in.
+            keysym (str): The name of the key, for key events.
+            char (str): The character typed, for key events.
+        """
+        self.widget = widget  # Widget the event happened in
+        self.keysym = keysym  # Name of the key
+        self.char = char  # Character typed
+        self.time = int(monotonic() * 1000)  # Virtual time of the event in milliseconds
+
+
+class Widget:
+    """Widget with the geometry, configuration and binding calls the game uses."""
+
+    def __init__(self, master=None, **options):
+        """
+        Initialize a Widget instance.
+
+        Args:
+            master (Widget): The parent widget.
+            **options: The widget's configuration options.
+        """
+        self.master = master  # Parent widget
+        self.children = []  # Child widgets, in creation order
+        self.options = dict(options)  # Configuration options
+        self.bindings = {}  # Callbacks by event sequence
+        self.manager = None  # Geometry manager placing the widget ('place', 'pack'), if any
+        self.geometry_options = {}  # Options passed to the geometry manager
+        self.destroyed = False  # Whether the widget has been destroyed
+        self.call_count = 0  # Number of calls made to the widget, like Tcl round trips
+        if master is not None:
+            master.children.append(self)
+
+    def root(self):
+        """
+        Get the root window.
+
+        Returns:
+            Tk: The root window.
+        """
+        widget = self
+        while widget.master is not None:
+            widget = widget.master
+        return widget
+
+    def count_call(self):
+        """Count a call on this widget and on the root window."""
+        self.call_count += 1
+        root = self.root()
+        if root is not self:
+            root.call_count += 1
+
+    def config(self, **options):
+        """
+        Change configuration options.
+
+        Args:
+            **options: The options to change.
+        """
+        self.count_call()
+        self.options.update(options)
+
+    configure = config
+
+    def cget(self, option):
+        """
+        Get a configuration option.
+
+        Args:
+            option (str): The name of the option.
+
+        Returns:
+            The value of the option, or an empty string if it isn't set.
+        """
+        return self.options.get(option, "")
+
+    def place(self, **options):
+        """
+        Place the widget.
+
+        Args:
+            **options: The place options.
+        """
+        self.count_call()
+        self.manager = "place"
+        self.geometry_options = dict(options)
+
+    def place_forget(self):
+        """Stop placing the widget."""
+        self.count_call()
+        if self.manager == "place":
+            self.manager = None
+
+    def pack(self, **options):
+        """
+        Pack the widget.
+
+        Args:
+            **options: The pack options.
+        """
+        self.count_call()
+        self.manager = "pack"
+        self.geometry_options = dict(options)
+
+    def winfo_ismapped(self):
+        """
+        Check if the widget and all its parents are being displayed.
+
+        Returns:
+            bool: True if the widget is displayed, False otherwise.
+        """
+        widget = self
+        while widget.master is not None:
+            if widget.manager is None or widget.destroyed:
+                return False
+            widget = widget.master
+        return not widget.destroyed
+
+    def winfo_exists(self):
+        """
+        Check if the widget still exists.
+
+        Returns:
+            bool: True if the widget hasn't been destroyed, False otherwise.
+        """
+        return not self.destroyed
+
+    def winfo_children(self):
+        """
+        Get the child widgets that haven't been destroyed.
+
+        Returns:
+            list: The child widgets.
+        """
+        return [child for child in self.children if not child.destroyed]
+
+    def bind(self, sequence, func, add=None):
+        """
+        Bind a callback to an event sequence such as '<q>' or '<KeyPress>'.
+
+        Args:
+            sequence (str): The event sequence.
+            func (callable): The callback, called with an Event.
+            add (str): '+' to add to the existing callbacks instead of replacing them.
+        """
+        if add:
+            self.bindings.setdefault(sequence, []).append(func)
+        else:
+            self.bindings[sequence] = [func]
+
+    def bind_all(self, sequence, func, add=None):
+        """
+        Bind a callback to an event sequence in every widget, on top of the widget's own bindings.
+
+        Args:
+            sequence (str): The event sequence.
+            func (callable): The callback, called with an Event.
+            add (str): '+' to add to the existing callbacks instead of replacing them.
+        """
+        all_bindings = self.root().all_bindings
+        if add:
+            all_bindings.setdefault(sequence, []).append(func)
+        else:
+            all_bindings[sequence] = [func]
+
+    def unbind(self, sequence):
+        """
+        Remove the callbacks bound to an event sequence.
+
+        Args:
+            sequence (str): The event sequence.
+        """
+        self.bindings.pop(sequence, None)
+
+    def event_generate(self, sequence):
+        """
+        Run the callbacks for an event, as if it happened.
+
+        Like Tk, only the most specific bound sequence runs, so '<q>' runs a '<q>' binding
+        if there is one and a '<KeyPress>' binding otherwise. The widget's own bindings run
+        first, then the bindings made with bind_all.
+
+        Args:
+            sequence (str): The event sequence, such as '<q>', '<KeyRelease-q>' or '<FocusOut>'.
+        """
+        name = sequence.strip("<>")
+        if name.startswith("KeyRelease-"):
+            keysym = name[len("KeyRelease-"):]
+            candidates = [sequence, "<KeyRelease>"]
+        elif name.startswith("KeyPress-") or len(name) == 1:
+            keysym = name.split("-")[-1]
+            candidates = [f"<{keysym}>", f"<KeyPress-{keysym}>", "<KeyPress>", "<Key>"]
+        else:
+            keysym = ""
+            candidates = [sequence]
+
+        event = Event(self, keysym=keysym, char=keysym if len(keysym) == 1 else "")
+        for bindings in (self.bindings, self.root().all_bindings):
+            for candidate in candidates:
+                if candidate in bindings:
+                    for func in bindings[candidate]:
+                        func(event)
+                    break
+
+    def destroy(self):
+        """Destroy the widget and its children."""
+        for child in self.children:
+            child.destroy()
+        self.destroyed = True
+
+
+class Tk(Widget):
+    """Root window with a virtual clock that runs timed callbacks instantly, in time order."""
+
+    def __init__(self):
+        """Initialize a Tk instance and make it the default root."""
+        global default_root
+        super().__init__()
+        self.virtual_time = 0.0  # Virtual time in seconds
+        self.timers = []  # Heap of (due time, sequence number, after id, callback, arguments)
+        self.cancelled = set()  # After ids that have been cancelled
+        self.next_after_id = 0  # Counter used to name after() callbacks
+        self.window_title = ""  # Title of the window
+        self.window_geometry = ""  # Geometry string of the window
+        self.all_bindings = {}  # Callbacks bound with bind_all, by event sequence
+        default_root = self
+
+        # Like a window manager, show and draw the window once the event loop runs
+        self.after(0, self.event_generate, "<Map>")
+        self.after(0, self.event_generate, "<Expose>")
+
+    def title(self, text=None):
+        """
+        Set or get the window title.
+
+        Args:
+            text (str): The new title, or None to get the current one.
+
+        Returns:
+            str: The current title, when getting it.
+        """
+        if text is None:
+            return self.window_title
+        self.window_title = text
+
+    def geometry(self, text=None):
+        """
+        Set or get the window geometry.
+
+        Args:
+            text (str): The new geometry, or None to get the current one.
+
+        Returns:
+            str: The current geometry, when getting it.
+        """
+        if text is None:
+            return self.window_geometry
+        self.window_geometry = text
+
+    def resizable(self, width=None, height=None):
+        """Accept the resizable setting, which has no effect without a display."""
+
+    def winfo_screenwidth(self):
+        """
+        Get the width of the pretend screen.
+
+        Returns:
+            int: The width in pixels.
+        """
+        return 1920
+
+    def winfo_screenheight(self):
+        """
+        Get the height of the pretend screen.
+
+        Returns:
+            int: The height in pixels.
+        """
+        return 1080
+
+    def after(self, ms, func=None, *args):
+        """
+        Call a function after a number of milliseconds of virtual time.
+
+        Args:
+            ms (int): The delay in milliseconds.
+            func (callable): The function to call.
+            *args: The arguments to call it with.
+
+        Returns:
+            str: The id of the callback, for after_cancel.
+        """
+        self.count_call()
+        self.next_after_id += 1
+        after_id = f"after#{self.next_after_id}"
+        due = self.virtual_time + max(int(ms), 0) / 1000
+        heapq.heappush(self.timers, (due, self.next_after_id, after_id, func, args))
+        return after_id
+
+    def after_idle(self, func, *args):
+        """
+        Call a function once the callbacks already due have run.
+
+        Args:
+            func (callable): The function to call.
+            *args: The arguments to call it with.
+
+        Returns:
+            str: The id of the callback, for after_cancel.
+        """
+        return self.after(0, func, *args)
+
+    def after_cancel(self, after_id):
+        """
+        Cancel a callback scheduled with after or after_idle.
+
+        Args:
+            after_id (str): The id of the callback.
+        """
+        self.count_call()
+        self.cancelled.add(after_id)
+
+    def pending(self):
+        """
+        Check if any callbacks are waiting to run.
+
+        Returns:
+            bool: True if a callback is scheduled, False otherwise.
+        """
+        return any(timer[2] not in self.cancelled for timer in self.timers)
+
+    def run_next(self):
+        """
+        Advance the virtual clock to the next callback and run it.
+
+        Returns:
+            bool: True if a callback ran, False if there were none.
+        """
+        while self.timers:
+            due, sequence, after_id, func, args = heapq.heappop(self.timers)
+            if after_id in self.cancelled:
+                self.cancelled.discard(after_id)
+                continue
+            self.virtual_time = max(self.virtual_time, due)
+            func(*args)
+            return True
+        return False
+
+    def run_for(self, seconds):
+        """
+        Run every callback due within a number of seconds of virtual time.
+
+        Args:
+            seconds (float): The virtual time to run for.
+        """
+        end_time = self.virtual_time + seconds
+        while not self.destroyed and self.timers and self.timers[0][0] <= end_time:
+            self.run_next()
+        if not self.destroyed:
+            self.virtual_time = max(self.virtual_time, end_time)
+
+    def mainloop(self, n=0):
+        """Run callbacks until the window is destroyed or nothing is left to run."""
+        while not self.destroyed and self.run_next():
+            pass
+
+    def update(self):
+        """Run every callback that is already due."""
+        self.run_for(0)
+
+    def update_idletasks(self):
+        """Accept the request to redraw, which has nothing to do without a display."""
+
+    def destroy(self):
+        """Destroy the window and drop every pending callback."""
+        super().destroy()
+        self.timers.clear()
+
+
+class Frame(Widget):
+    """Stand-in for tk.Frame."""
+
+
+class Label(Widget):
+    """Stand-in for tk.Label."""
+
+
+class Button(Widget):
+    """Stand-in for tk.Button."""
+
+    def invoke(self):
+        """
+        Press the button.
+
+        Returns:
+            The value returned by the button's command, if it has one.
+        """
+        command = self.options.get("command")
+        if command:
+            return command()
+
+
+class Entry(Widget):
+    """Stand-in for tk.Entry."""
+
+    def __init__(self, master=None, **options):
+        """
+        Initialize an Entry instance.
+
+        Args:
+            master (Widget): The parent widget.
+            **options: The widget's configuration options.
+        """
+        super().__init__(master, **options)
+        self.text = ""  # Text typed into the entry
+
+    def get(self):
+        """
+        Get the text in the entry.
+
+        Returns:
+            str: The text.
+        """
+        return self.text
+
+    def insert(self, index, text):
+        """
+        Insert text into the entry.
+
+        Args:
+            index (int or str): The position to insert at, or 'end'.
+            text (str): The text to insert.
+        """
+        position = len(self.text) if index == "end" else int(index)
+        self.text = self.text[:position] + text + self.text[position:]
+
+    def delete(self, first, last=None):
+        """
+        Delete text from the entry.
+
+        Args:
+            first (int or str): The position of the first character to delete.
+            last (int or str): The position after the last character to delete, or 'end'.
+        """
+        first = len(self.text) if first == "end" else int(first)
+        if last is None:
+            last = first + 1
+        last = len(self.text) if last == "end" else int(last)
+        self.text = self.text[:first] + self.text[last:]
+
+
+class CanvasItem:
+    """One item drawn on a Canvas."""
+
+    def __init__(self, item_type, coords, options):
+        """
+        Initialize a CanvasItem instance.
+
+        Args:
+            item_type (str): The type of item ('image', 'rectangle', 'line', 'text').
+            coords (list): The coordinates of the item.
+            options (dict): The item's options, including any tags.
+        """
+        tags = options.pop("tags", options.pop("tag", ()))
+        self.item_type = item_type  # Type of item
+        self.coords = [float(value) for value in coords]  # Coordinates of the item
+        self.tags = [tags] if isinstance(tags, str) else list(tags)  # Tags of the item
+        self.options = options  # Other options of the item
+
+
+class Canvas(Widget):
+    """Stand-in for tk.Canvas that keeps its items in memory."""
+
+    def __init__(self, master=None, **options):
+        """
+        Initialize a Canvas instance.
+
+        Args:
+            master (Widget): The parent widget.
+            **options: The widget's configuration options.
+        """
+        super().__init__(master, **options)
+        self.items = {}  # Items by id, in creation order
+        self.next_item_id = 0  # Counter used to number items
+
+    def create_item(self, item_type, coords, options):
+        """
+        Create an item of any type.
+
+        Args:
+            item_type (str): The type of item.
+            coords (tuple): The coordinates of the item.
+            options (dict): The item's options.
+
+        Returns:
+            int: The id of the new item.
+        """
+        self.count_call()
+        if len(coords) == 1:
+            coords = coords[0]  # Coordinates passed as one list
+        self.next_item_id += 1
+        self.items[self.next_item_id] = CanvasItem(item_type, coords, options)
+        return self.next_item_id
+
+    def create_image(self, *coords, **options):
+        """Create an image item. See create_item."""
+        return self.create_item("image", coords, options)
+
+    def create_rectangle(self, *coords, **options):
+        """Create a rectangle item. See create_item."""
+        return self.create_item("rectangle", coords, options)
+
+    def create_line(self, *coords, **options):
+        """Create a line item. See create_item."""
+        return self.create_item("line", coords, options)
+
+    def create_text(self, *coords, **options):
+        """Create a text item. See create_item."""
+        return self.create_item("text", coords, options)
+
+    def matching(self, tag_or_id):
+        """
+        Get the ids of the items matching a tag or an item id, in creation order.
+
+        Args:
+            tag_or_id (str or int): The tag, 'all', or an item id.
+
+        Returns:
+            list: The matching item ids.
+        """
+        if isinstance(tag_or_id, int) or (isinstance(tag_or_id, str) and tag_or_id.isdigit()):
+            return [int(tag_or_id)] if int(tag_or_id) in self.items else []
+        if tag_or_id == "all":
+            return list(self.items)
+        return [item_id for item_id, item in self.items.items() if tag_or_id in item.tags]
+
+    def find_withtag(self, tag_or_id):
+        """
+        Find the items matching a tag or an item id.
+
+        Args:
+            tag_or_id (str or int): The tag, 'all', or an item id.
+
+        Returns:
+            tuple: The matching item ids.
+        """
+        self.count_call()
+        return tuple(self.matching(tag_or_id))
+
+    def move(self, tag_or_id, dx, dy):
+        """
+        Move the items matching a tag or an item id.
+
+        Args:
+            tag_or_id (str or int): The tag or item id.
+            dx (float): The distance to move right.
+            dy (float): The distance to move down.
+        """
+        self.count_call()
+        for item_id in self.matching(tag_or_id):
+            coords = self.items[item_id].coords
+            for index in range(0, len(coords), 2):
+                coords[index] += dx
+                coords[index + 1] += dy
+
+    def coords(self, tag_or_id, *coords):
+        """
+        Get or set the coordinates of the first item matching a tag or an item id.
+
+        Args:
+            tag_or_id (str or int): The tag or item id.
+            *coords: The new coordinates, or nothing to get the current ones.
+
+        Returns:
+            list: The coordinates, when getting them.
+        """
+        self.count_call()
+        item_ids = self.matching(tag_or_id)
+        if not coords:
+            return list(self.items[item_ids[0]].coords) if item_ids else []
+        if len(coords) == 1:
+            coords = coords[0]  # Coordinates passed as one list
+        for item_id in item_ids[:1]:
+            self.items[item_id].coords = [float(value) for value in coords]
+
+    def itemconfig(self, tag_or_id, **options):
+        """
+        Change the options of the items matching a tag or an item id.
+
+        Args:
+            tag_or_id (str or int): The tag or item id.
+            **options: The options to change.
+        """
+        self.count_call()
+        for item_id in self.matching(tag_or_id):
+            self.items[item_id].options.update(options)
+
+    itemconfigure = itemconfig
+
+    def itemcget(self, tag_or_id, option):
+        """
+        Get an option of the first item matching a tag or an item id.
+
+        Args:
+            tag_or_id (str or int): The tag or item id.
+            option (str): The name of the option.
+
+        Returns:
+            The value of the option, or an empty string if it isn't set.
+        """
+        self.count_call()
+        item_ids = self.matching(tag_or_id)
+        return self.items[item_ids[0]].options.get(option, "") if item_ids else ""
+
+    def gettags(self, tag_or_id):
+        """
+        Get the tags of the first item matching a tag or an item id.
+
+        Args:
+            tag_or_id (str or int): The tag or item id.
+
+        Returns:
+            tuple: The tags.
+        """
+        self.count_call()
+        item_ids = self.matching(tag_or_id)
+        return tuple(self.items[item_ids[0]].tags) if item_ids else ()
+
+    def addtag_withtag(self, new_tag, tag_or_id):
+        """
+        Add a tag to the items matching a tag or an item id.
+
+        Args:
+            new_tag (str): The tag to add.
+            tag_or_id (str or int): The tag or item id.
+        """
+        self.count_call()
+        for item_id in self.matching(tag_or_id):
+            if new_tag not in self.items[item_id].tags:
+                self.items[item_id].tags.append(new_tag)
+
+    def dtag(self, tag_or_id, tag_to_delete=None):
+        """
+        Remove a tag from the items matching a tag or an item id.
+
+        Args:
+            tag_or_id (str or int): The tag or item id.
+            tag_to_delete (str): The tag to remove, or None to remove tag_or_id itself.
+        """
+        self.count_call()
+        if tag_to_delete is None:
+            tag_to_delete = tag_or_id
+        for item_id in self.matching(tag_or_id):
+            if tag_to_delete in self.items[item_id].tags:
+                self.items[item_id].tags.remove(tag_to_delete)
+
+    def delete(self, *tags_or_ids):
+        """
+        Delete the items matching any of some tags or item ids.
+
+        Args:
+            *tags_or_ids: The tags or item ids.
+        """
+        self.count_call()
+        for tag_or_id in tags_or_ids:
+            for item_id in self.matching(tag_or_id):
+                del self.items[item_id]
+
+
+class PhotoImage:
+    """Stand-in for tk.PhotoImage that only reads the size of PNG files."""
+
+    def __init__(self, file=None, width=0, height=0, **options):
+        """
+        Initialize a PhotoImage instance.
+
+        A file that is missing or isn't a PNG gives a 1 by 1 image, so the game can run
+        without its image files.
+
+        Args:
+            file (str): The path of a PNG file, or None for a blank image.
+            width (int): The width of a blank image.
+            height (int): The height of a blank image.
+        """
+        self.file = file  # Path of the image file
+        self.image_width, self.image_height = width, height  # Size of the image
+        self.puts = []  # Colours put into the image, with the area they were put into
+        if file is not None:
+            self.image_width, self.image_height = 1, 1
+            if os.path.exists(file):
+                with open(file, "rb") as image_file:
+                    header = image_file.read(24)
+                if header[:8] == b"\x89PNG\r\n\x1a\n":
+                    self.image_width, self.image_height = struct.unpack(">II", header[16:24])
+
+    def width(self):
+        """
+        Get the width of the image.
+
+        Returns:
+            int: The width in pixels.
+        """
+        return self.image_width
+
+    def height(self):
+        """
+        Get the height of the image.
+
+        Returns:
+            int: The height in pixels.
+        """
+        return self.image_height
+
+    def put(self, data, to=None):
+        """
+        Record colours put into the image. There are no real pixels to change.
+
+        Args:
+            data (str): The colour or rows of colours.
+            to (tuple): The area the colours were put into.
+        """
+        self.puts.append((data, to))
@@ -0,0 +1,398 @@
+"""Standalone Trivia Turbo match server, and a load generator that plays a whole school against it.
+
+Run with:
+    python match_server.py                          Serve matches on port 50512
+    python match_server.py --port 6000              Serve matches on another port
+    python match_server.py --load                   Start a server and play 100 matches against it
+    python match_server.py --load 300               Start a server and play 300 matches against it
+    python match_server.py --load 300 --connect HOST:PORT
+                                                    Play 300 matches against a server already running
+
+Every match runs in a MatchRoom from netplay.py, and every room shares one asyncio event loop,
+so the server deals the questions, scores the answers and checks for a winner the same way
+a game hosting with --host does. Games join with --join=HOST[:PORT] and --match=ID.
+
+The load generator connects every simulated player at once, answers each question after a
+random think time, and times how long each answer takes to come back as a SCORE message at
+every player in the match. The times include the load generator's own event loop, so they
+are an upper bound on the server's share.
+"""
+import argparse  # Import the argparse library for command line options
+import asyncio  # Import asyncio for the sockets
+import os  # Import the os library for the path of this script
+import random  # Import the random library for think times and wrong answers
+import socket  # Import the socket library to turn off Nagle's algorithm
+import subprocess  # Import the subprocess library to start a server for the load generator
+import sys  # Import the sys library for the Python executable
+import time  # Import the time library for timing answers
+from netplay import (ANSWER, DEFAULT_PORT, DIFFICULTIES, JOIN, MESSAGES, QUESTION, SCORE, WELCOME, WIN, NetplayHost,
+                     encode, read_message, valid_join)
+
+
+SERVER_BACKLOG = 1024  # Connections the server queues while the event loop is busy
+LOAD_MATCHES = 100  # Matches the load generator plays at once
+LOAD_PLAYERS = 2  # Players in each load generator match
+THINK_TIME = 0.5  # Average time in seconds a simulated player takes to answer
+ACCURACY = 0.8  # Fraction of questions a simulated player answers correctly
+LOAD_TIMEOUT = 60  # Longest time in seconds the load generator waits for its matches to finish
+
+
+class PlayerProtocol(asyncio.Protocol):
+    """
+    One player's connection to the server. Messages are unpacked straight from the bytes the
+    socket delivers, instead of waking a stream reader task for every message.
+    """
+
+    def __init__(self, server):
+        """
+        Initialize a PlayerProtocol for a new connection.
+
+        Args:
+            server (MatchServer): The server whose rooms the player joins.
+        """
+        self.server = server  # Server whose rooms the player joins
+        self.transport = None  # Connection to the player, once made
+        self.buffer = bytearray()  # Bytes received that don't make a whole message yet
+        self.room = None  # Room joined, once joined
+        self.index = None  # Position in the room, once joined
+
+    def connection_made(self, transport):
+        """
+        Remember the connection to the player.
+
+        Args:
+            transport (asyncio.Transport): The connection.
+        """
+        self.transport = transport
+
+    def data_received(self, data):
+        """
+        Handle every whole message received, keeping any partial one for later.
+
+        Args:
+            data (bytes): The bytes received.
+        """
+        self.buffer += data
+        offset = 0
+        while offset < len(self.buffer) and not self.transport.is_closing():
+            layout = MESSAGES.get(self.buffer[offset])
+            if layout is None:
+                self.transport.close()  # Not a message, so stop listening to this player
+                return
+            if offset + layout.size > len(self.buffer):
+                break  # The rest of the message hasn't arrived yet
+            self.handle(layout.unpack_from(self.buffer, offset))
+            offset += layout.size
+        del self.buffer[:offset]
+
+    def handle(self, message):
+        """
+        Join the room the player asks for, or pass on their answer.
+
+        Args:
+            message (tuple): The type and values of the message.
+        """
+        if message[0] == ANSWER and self.index is not None:
+            self.room.answer(self.index, message[1])
+        elif message[0] == JOIN and self.room is None:
+            message_type, match_id, difficulty, player_count = message
+            if not valid_join(difficulty, player_count):
+                self.transport.close()  # Not a match the server can open, so drop only this player
+                return
+            self.room = self.server.room_for(match_id, DIFFICULTIES[difficulty], player_count)
+            if self.room is None:
+                self.transport.close()  # The server is full
+                return
+            self.index = self.room.join(self.transport.write)
+            if self.index is None:
+                self.transport.close()  # The room is full
+
+    def connection_lost(self, exception):
+        """
+        Stop sending to the player once they have gone.
+
+        Args:
+            exception (Exception): The error that closed the connection, or None.
+        """
+        if self.index is not None:
+            self.room.leave(self.index)
+            self.index = None
+
+
+class MatchServer(NetplayHost):
+    """Host that runs every match room on the event loop of its own process."""
+
+    def __init__(self, port=DEFAULT_PORT, address="0.0.0.0"):
+        """
+        Initialize a MatchServer instance. Nothing runs until it is served.
+
+        Args:
+            port (int): The port to listen on.
+            address (str): The address to listen on.
+        """
+        super().__init__(port, address)
+        self.matches_opened = 0  # Number of rooms opened since the server started
+
+    def room_for(self, match_id, difficulty, player_count):
+        """
+        Get the room for a match id, opening a new one if there is none, or the last one has
+        finished, is full or has lost a player.
+
+        Args:
+            match_id (int): The id of the match.
+            difficulty (str): The difficulty level, used if a new room is opened.
+            player_count (int): The number of players, used if a new room is opened.
+
+        Returns:
+            MatchRoom: The room, or None if the server can't open another one.
+        """
+        last_room = self.rooms.get(match_id)
+        room = super().room_for(match_id, difficulty, player_count)
+        if room is not None and room is not last_room:
+            self.matches_opened += 1
+        return room
+
+    async def serve(self):
+        """Listen for players on the running event loop until the server is stopped."""
+        self.loop = asyncio.get_running_loop()  # Rooms run here, so LoopbackClients can join too
+        self.server = await self.loop.create_server(lambda: PlayerProtocol(self), self.address, self.port,
+                                                    backlog=SERVER_BACKLOG)
+        print(f"Serving Trivia Turbo matches on {self.address}:{self.port}")
+        async with self.server:
+            await self.server.serve_forever()
+
+
+def percentile(timings, fraction):
+    """
+    Get a percentile of some timings.
+
+    Args:
+        timings (list): The timings.
+        fraction (float): The percentile as a fraction, such as 0.95.
+
+    Returns:
+        float: The timing at the percentile.
+    """
+    ordered = sorted(timings)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class SimulatedMatch:
+    """One load generator match, with the times its players sent each answer and how long they took."""
+
+    def __init__(self, match_id, player_count):
+        """
+        Initialize a SimulatedMatch with no answers sent.
+
+        Args:
+            match_id (int): The id the players join the match with.
+            player_count (int): The number of players in the match.
+        """
+        self.match_id = match_id  # Id the players join the match with
+        self.player_count = player_count  # Number of players in the match
+        self.sent = [[] for _ in range(player_count)]  # Times each player sent their answers
+        self.latencies = []  # Seconds from an answer being sent to its score arriving at a player
+        self.winner = None  # Position of the player who won, once someone has
+
+    async def play(self, address, port, difficulty, think_time, accuracy, rng):
+        """
+        Play one simulated player until the match is won.
+
+        Args:
+            address (str): The server's address.
+            port (int): The server's port.
+            difficulty (str): The difficulty level, used if the server opens a new room.
+            think_time (float): The average time in seconds taken to answer.
+            accuracy (float): The fraction of questions answered correctly.
+            rng (random.Random): The random number generator for think times and wrong answers.
+        """
+        reader, writer = await asyncio.open_connection(address, port)
+        writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        writer.write(encode(JOIN, self.match_id, DIFFICULTIES.index(difficulty), self.player_count))
+
+        loop = asyncio.get_running_loop()
+        index = None  # This player's position in the match, once welcomed
+        received = [0] * self.player_count  # Scores received for each player so far
+        pending = None  # Answer waiting for its think time to pass
+
+        def answer(answer_index):
+            self.sent[index].append(time.perf_counter())
+            writer.write(encode(ANSWER, answer_index))
+
+        try:
+            while self.winner is None:
+                message = await read_message(reader)
+                if message[0] == WELCOME:
+                    index = message[1]
+                elif message[0] == QUESTION and message[1] == index:
+                    answer_index = message[3]  # Position of the correct answer
+                    if rng.random() >= accuracy:
+                        answer_index = (answer_index + rng.randrange(1, 4)) % 4  # Any other answer
+                    # Answer later without blocking, so other players' scores are still timed as they arrive
+                    pending = loop.call_later(rng.expovariate(1 / think_time), answer, answer_index)
+                elif message[0] == SCORE:
+                    player = message[1]
+                    self.latencies.append(time.perf_counter() - self.sent[player][received[player]])
+                    received[player] += 1
+                elif message[0] == WIN:
+                    self.winner = message[1]
+        finally:
+            if pending is not None:
+                pending.cancel()
+            writer.close()
+
+
+def shard_port(port, match_id, shard_count=1):
+    """
+    Get the port of the server process a match is played on.
+
+    Args:
+        port (int): The first server process's port.
+        match_id (int): The id of the match.
+        shard_count (int): The number of server processes, each on the port after the last.
+
+    Returns:
+        int: The port.
+    """
+    return port + match_id % shard_count
+
+
+async def wait_for_server(address, port, timeout=10):
+    """
+    Wait until a server accepts connections.
+
+    Args:
+        address (str): The server's address.
+        port (int): The server's port.
+        timeout (float): The longest time in seconds to wait.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(address, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def run_load(address, port, match_count, player_count=LOAD_PLAYERS, difficulty="medium",
+                   think_time=THINK_TIME, accuracy=ACCURACY, timeout=LOAD_TIMEOUT, seed=None, shard_count=1):
+    """
+    Play many simulated matches against a server at once.
+
+    Args:
+        address (str): The server's address.
+        port (int): The server's port, or the first shard's port if there are several.
+        match_count (int): The number of matches to play.
+        player_count (int): The number of players in each match.
+        difficulty (str): The difficulty level of the questions.
+        think_time (float): The average time in seconds a player takes to answer.
+        accuracy (float): The fraction of questions answered correctly.
+        timeout (float): The longest time in seconds to wait for the matches to finish.
+        seed (int): The seed for think times and wrong answers, or None for a random one.
+        shard_count (int): The number of server processes, each on the port after the last.
+
+    Returns:
+        tuple: The matches played and the time in seconds they took.
+    """
+    rng = random.Random(seed)
+    # Match ids start from a random offset, so a second run doesn't join the first run's rooms
+    first_id = rng.randrange(1 << 30)
+    matches = [SimulatedMatch(first_id + number, player_count) for number in range(match_count)]
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(match.play(address, shard_port(port, match.match_id, shard_count),
+                                            difficulty, think_time, accuracy, rng))
+             for match in matches for _ in range(player_count)]
+    done, unfinished = await asyncio.wait(tasks, timeout=timeout)
+    for task in unfinished:
+        task.cancel()
+    for task in done:
+        if task.exception() is not None and not isinstance(task.exception(), (ConnectionError, asyncio.IncompleteReadError)):
+            raise task.exception()
+    return matches, time.perf_counter() - start
+
+
+def report_load(matches, duration, per_match=False):
+    """
+    Print the answer latencies overall and per match.
+
+    Args:
+        matches (list): The SimulatedMatches played.
+        duration (float): The time in seconds the matches took.
+        per_match (bool): True to print a line for every match.
+    """
+    finished = [match for match in matches if match.winner is not None]
+    latencies = [latency for match in matches for latency in match.latencies]
+    answers = sum(len(sent) for match in matches for sent in match.sent)
+    print(f"{len(finished)} of {len(matches)} matches finished in {duration:.1f} s, "
+          f"{answers} answers ({answers / duration:.0f} per second)")
+    if not latencies:
+        return
+
+    print(f"Answer to score latency: median {percentile(latencies, 0.5) * 1000:.2f} ms, "
+          f"95th percentile {percentile(latencies, 0.95) * 1000:.2f} ms, "
+          f"99th percentile {percentile(latencies, 0.99) * 1000:.2f} ms, worst {max(latencies) * 1000:.2f} ms")
+
+    timed = [match for match in matches if match.latencies]
+    match_p95s = [percentile(match.latencies, 0.95) for match in timed]
+    worst = timed[match_p95s.index(max(match_p95s))]
+    print(f"Per-match 95th percentile: median {percentile(match_p95s, 0.5) * 1000:.2f} ms, "
+          f"worst {max(match_p95s) * 1000:.2f} ms (match {worst.match_id})")
+
+    if per_match:
+        for match in timed:
+            print(f"  Match {match.match_id}: {len(match.latencies)} scores, "
+                  f"median {percentile(match.latencies, 0.5) * 1000:.2f} ms, "
+                  f"95th percentile {percentile(match.latencies, 0.95) * 1000:.2f} ms, "
+                  f"worst {max(match.latencies) * 1000:.2f} ms")
+
+
+def main():
+    """Serve matches, or play simulated matches against a server and report the latencies."""
+    parser = argparse.ArgumentParser(description="Serve Trivia Turbo matches, or load test a server.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to serve on")
+    parser.add_argument("--address", default="0.0.0.0", help="address to serve on")
+    parser.add_argument("--load", type=int, nargs="?", const=LOAD_MATCHES, help="number of simulated matches to play")
+    parser.add_argument("--connect", help="HOST[:PORT] of a running server to load, instead of starting one")
+    parser.add_argument("--players", type=int, default=LOAD_PLAYERS, help="players in each simulated match")
+    parser.add_argument("--difficulty", choices=DIFFICULTIES, default="medium", help="difficulty of the questions")
+    parser.add_argument("--think", type=float, default=THINK_TIME, help="average seconds taken to answer")
+    parser.add_argument("--accuracy", type=float, default=ACCURACY, help="fraction of answers that are correct")
+    parser.add_argument("--timeout", type=float, default=LOAD_TIMEOUT, help="seconds to wait for the matches")
+    parser.add_argument("--seed", type=int, help="seed for think times and wrong answers")
+    parser.add_argument("--per-match", action="store_true", help="print the latencies of every match")
+    args = parser.parse_args()
+
+    if args.load is None:
+        server = MatchServer(args.port, args.address)
+        try:
+            asyncio.run(server.serve())
+        except KeyboardInterrupt:
+            print(f"Opened {server.matches_opened} matches")
+        return
+
+    server = None
+    if args.connect:
+        address, _, port = args.connect.partition(":")
+        port = int(port or DEFAULT_PORT)
+    else:
+        # Run the server in its own process, so it doesn't share an event loop with the players
+        address, port = "127.0.0.1", args.port
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--port", str(port), "--address", address])
+
+    try:
+        asyncio.run(wait_for_server(address, port))
+        matches, duration = asyncio.run(run_load(address, port, args.load, args.players, args.difficulty,
+                                                 args.think, args.accuracy, args.timeout, args.seed))
+        report_load(matches, duration, args.per_match)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""Trivia Turbo matches spread across one server process per core, with a shared-memory scoreboard.
+
+Run with:
+    python match_shards.py                    Serve matches on one shard per core, printing the scoreboard
+    python match_shards.py --shards 4         Serve matches on 4 shards
+    python match_shards.py --load 1000        Start the shards and play 1000 simulated matches against them
+
+Shard N is a MatchServer listening on the first port plus N, and a match is played on the shard
+given by its id modulo the number of shards, so a game joins match 7 of 4 shards on port 50512
+with --join=HOST:50515 --match=7.
+
+Every shard writes the live scores of its matches into its own slots of one shared-memory
+scoreboard. Each slot starts with a version counter that is odd while the slot is being
+written, so a reader can copy any slot without locks, pickling or messages to the shards:
+it reads the version, the slot and the version again, and tries again if they differ. A slot
+left half written by a shard that died is reported as stale instead of being waited on forever.
+"""
+import argparse  # Import the argparse library for command line options
+import asyncio  # Import asyncio for the load generator
+import collections  # Import the collections library for the queue of free slots
+import multiprocessing  # Import the multiprocessing library for the shard processes
+import os  # Import the os library for the number of cores
+import struct  # Import the struct library for packing the scoreboard slots
+import time  # Import the time library for timing snapshots
+from multiprocessing import shared_memory  # Import shared memory for the scoreboard
+from match_server import (ACCURACY, LOAD_MATCHES, LOAD_PLAYERS, LOAD_TIMEOUT, THINK_TIME, MatchServer, report_load,
+                          run_load, wait_for_server)
+from netplay import DEFAULT_PORT, DIFFICULTIES, MatchRoom
+
+
+MAX_SCOREBOARD_PLAYERS = 8  # Players whose scores fit in a scoreboard slot
+SLOT = struct.Struct("<IIBB8B2x")  # Version, match id, player count, winner, scores
+VERSION = struct.Struct("<I")  # Version counter at the start of every slot
+NO_WINNER = 255  # Winner stored while a match is still being played
+SLOTS_PER_SHARD = 256  # Most matches each shard plays at once, one scoreboard slot each
+SCOREBOARD_INTERVAL = 2.0  # Time in seconds between scoreboard summaries while serving
+READ_TIMEOUT = 0.05  # Time in seconds to wait for a slot being written before calling it stale
+
+
+class Scoreboard:
+    """Live scores of every match, in shared memory that one process per slot writes and any process reads."""
+
+    def __init__(self, slot_count, name=None):
+        """
+        Initialize a Scoreboard, creating the shared memory or attaching to an existing one.
+
+        Args:
+            slot_count (int): The number of match slots.
+            name (str): The name of the shared memory to attach to, or None to create it.
+        """
+        self.slot_count = slot_count  # Number of match slots
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=slot_count * SLOT.size)
+            self.memory.buf[:slot_count * SLOT.size] = bytes(slot_count * SLOT.size)  # Every slot starts empty
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.name = self.memory.name  # Name other processes attach with
+        self.stale_slots = []  # Slots the last snapshot gave up on because they stayed half written
+
+    def publish(self, slot, match_id, scores, winner=NO_WINNER):
+        """
+        Write a match's scores into its slot. Only one process may write each slot.
+
+        Args:
+            slot (int): The slot of the match.
+            match_id (int): The id of the match.
+            scores (list): The score of each player.
+            winner (int): The position of the winner, or NO_WINNER.
+        """
+        buffer = self.memory.buf
+        offset = slot * SLOT.size
+        version = VERSION.unpack_from(buffer, offset)[0]
+        VERSION.pack_into(buffer, offset, (version + 1) & 0xFFFFFFFF)  # Odd while the slot is being written
+        padded = list(scores[:MAX_SCOREBOARD_PLAYERS]) + [0] * (MAX_SCOREBOARD_PLAYERS - len(scores))
+        SLOT.pack_into(buffer, offset, (version + 1) & 0xFFFFFFFF, match_id, len(scores), winner, *padded)
+        VERSION.pack_into(buffer, offset, (version + 2) & 0xFFFFFFFF)  # Even again once it is whole
+
+    def read(self, slot):
+        """
+        Copy one slot, trying again if it was being written.
+
+        Args:
+            slot (int): The slot to read.
+
+        Returns:
+            tuple: The match id, the scores and the winner's position, or None if the slot is empty.
+
+        Raises:
+            TimeoutError: If the slot is still being written after READ_TIMEOUT seconds, such as
+                when the shard writing it died part way through.
+        """
+        buffer = self.memory.buf
+        offset = slot * SLOT.size
+        deadline = None  # Time to give up, set once the first copy fails
+        while True:
+            values = SLOT.unpack_from(buffer, offset)  # Fields are read in order, version first
+            version = values[0]
+            if version & 1 or VERSION.unpack_from(buffer, offset)[0] != version:
+                now = time.perf_counter()
+                if deadline is None:
+                    deadline = now + READ_TIMEOUT
+                elif now >= deadline:
+                    raise TimeoutError(f"Scoreboard slot {slot} has been half written for {READ_TIMEOUT} s")
+                time.sleep(0)  # A shard is writing the slot, so let it finish
+                continue
+            if version == 0:
+                return None
+            match_id, player_count, winner = values[1:4]
+            return match_id, values[4:4 + player_count], winner
+
+    def snapshot(self):
+        """
+        Copy every slot that holds a match, skipping any that stay half written.
+
+        The skipped slots are left in stale_slots until the next snapshot.
+
+        Returns:
+            list: The match id, scores and winner's position of every match.
+        """
+        matches = []
+        self.stale_slots = []
+        for slot in range(self.slot_count):
+            try:
+                match = self.read(slot)
+            except TimeoutError:
+                self.stale_slots.append(slot)  # Its shard probably died while writing it
+                continue
+            if match is not None:
+                matches.append(match)
+        return matches
+
+    def close(self):
+        """Detach from the shared memory."""
+        self.memory.close()
+
+    def unlink(self):
+        """Free the shared memory once every process has detached."""
+        self.memory.unlink()
+
+
+class ScoreboardRoom(MatchRoom):
+    """Match room that publishes its scores to a slot of the scoreboard whenever they change."""
+
+    scoreboard = None  # Scoreboard the room publishes to, once given a slot
+    slot = None  # Slot of the scoreboard the room publishes to
+
+    def join(self, send):
+        """
+        Add a player and publish the room's scores.
+
+        Args:
+            send (callable): A function that sends bytes to the player.
+
+        Returns:
+            int: The player's position in the match, or None if the match is full.
+        """
+        index = super().join(send)
+        self.publish()
+        return index
+
+    def answer(self, index, answer_index):
+        """
+        Score a player's answer and publish the room's scores.
+
+        Args:
+            index (int): The player's position in the match.
+            answer_index (int): The index of the answer they picked.
+        """
+        super().answer(index, answer_index)
+        self.publish()
+
+    def close(self):
+        """Publish the room's final scores, then give its slot back to the shard."""
+        if not self.closed:
+            self.publish()
+        super().close()
+
+    def publish(self):
+        """Write the room's scores and winner to its scoreboard slot, until the room is closed."""
+        if self.scoreboard is None or self.closed:
+            return  # A closed room's slot may belong to another room already
+        players = self.match.players
+        winner = NO_WINNER
+        for player in players:
+            if player.name == self.match.winner:
+                winner = player.index
+        self.scoreboard.publish(self.slot, self.match_id, [player.score for player in players], winner)
+
+
+class ShardServer(MatchServer):
+    """Match server for one shard, which publishes its rooms to its own slots of the scoreboard."""
+
+    room_class = ScoreboardRoom
+
+    def __init__(self, port, address, scoreboard, first_slot, slot_count):
+        """
+        Initialize a ShardServer instance. Nothing runs until it is served.
+
+        Args:
+            port (int): The port to listen on.
+            address (str): The address to listen on.
+            scoreboard (Scoreboard): The scoreboard to publish to.
+            first_slot (int): The first scoreboard slot this shard writes.
+            slot_count (int): The number of scoreboard slots this shard writes.
+        """
+        super().__init__(port, address)
+        self.scoreboard = scoreboard  # Scoreboard to publish to
+        # Slots no open room is using, oldest first, so finished scores stay up as long as possible
+        self.free_slots = collections.deque(range(first_slot, first_slot + slot_count))
+
+    def room_for(self, match_id, difficulty, player_count):
+        """
+        Get the room for a match id, giving a newly opened room a free scoreboard slot.
+
+        Args:
+            match_id (int): The id of the match.
+            difficulty (str): The difficulty level, used if a new room is opened.
+            player_count (int): The number of players, used if a new room is opened.
+
+        Returns:
+            ScoreboardRoom: The room, or None if every slot is in use.
+        """
+        last_room = self.rooms.get(match_id)
+        if (last_room is None or not last_room.open_to_join()) and not self.free_slots:
+            return None  # A new room would have nowhere to publish its scores
+        room = super().room_for(match_id, difficulty, player_count)
+        if room.scoreboard is None:
+            room.slot = self.free_slots.popleft()
+            room.scoreboard = self.scoreboard
+            room.publish()
+        return room
+
+    def close_room(self, room):
+        """
+        Forget a room once it is won or everyone has left, and free its scoreboard slot.
+
+        Args:
+            room (ScoreboardRoom): The room.
+        """
+        super().close_room(room)
+        if room.slot is not None:
+            self.free_slots.append(room.slot)
+
+
+def run_shard(shard, address, port, scoreboard_name, slot_count, slots_per_shard):
+    """
+    Serve one shard's matches. Runs in the shard's own process.
+
+    Args:
+        shard (int): The number of the shard.
+        address (str): The address to listen on.
+        port (int): The first shard's port.
+        scoreboard_name (str): The name of the scoreboard's shared memory.
+        slot_count (int): The number of slots on the scoreboard.
+        slots_per_shard (int): The number of slots each shard writes.
+    """
+    scoreboard = Scoreboard(slot_count, scoreboard_name)
+    server = ShardServer(port + shard, address, scoreboard, shard * slots_per_shard, slots_per_shard)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scoreboard.close()
+
+
+def start_shards(shard_count, address, port, scoreboard, slots_per_shard=SLOTS_PER_SHARD):
+    """
+    Start one server process per shard.
+
+    Args:
+        shard_count (int): The number of shards.
+        address (str): The address to listen on.
+        port (int): The first shard's port.
+        scoreboard (Scoreboard): The scoreboard the shards publish to.
+        slots_per_shard (int): The number of slots each shard writes.
+
+    Returns:
+        list: The shard processes.
+    """
+    processes = []
+    for shard in range(shard_count):
+        process = multiprocessing.Process(
+            target=run_shard, name=f"shard {shard}", daemon=True,
+            args=(shard, address, port, scoreboard.name, scoreboard.slot_count, slots_per_shard),
+        )
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def report_scoreboard(scoreboard):
+    """
+    Take a snapshot of the scoreboard and print how long it took and who is leading.
+
+    Args:
+        scoreboard (Scoreboard): The scoreboard.
+    """
+    start = time.perf_counter()
+    matches = scoreboard.snapshot()
+    snapshot_time = time.perf_counter() - start
+
+    won = [match for match in matches if match[2] != NO_WINNER]
+    print(f"Scoreboard: {len(matches) - len(won)} matches playing, {len(won)} won, "
+          f"snapshot of {scoreboard.slot_count} slots took {snapshot_time * 1000:.2f} ms")
+    if scoreboard.stale_slots:
+        print(f"  Stale slots, left half written: {', '.join(str(slot) for slot in scoreboard.stale_slots)}")
+    playing = [match for match in matches if match[2] == NO_WINNER and match[1]]
+    if playing:
+        match_id, scores, winner = max(playing, key=lambda match: max(match[1]))
+        print(f"  Closest to winning: match {match_id} with scores {', '.join(str(score) for score in scores)}")
+
+
+def main():
+    """Serve matches across the shards, or play simulated matches against them and report the latencies."""
+    parser = argparse.ArgumentParser(description="Serve Trivia Turbo matches across one process per core.")
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 1, help="number of server processes")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port of the first shard")
+    parser.add_argument("--address", default="0.0.0.0", help="address to serve on")
+    parser.add_argument("--slots", type=int, default=SLOTS_PER_SHARD, help="most matches each shard plays at once")
+    parser.add_argument("--load", type=int, nargs="?", const=LOAD_MATCHES, help="number of simulated matches to play")
+    parser.add_argument("--players", type=int, default=LOAD_PLAYERS, help="players in each simulated match")
+    parser.add_argument("--difficulty", choices=DIFFICULTIES, default="medium", help="difficulty of the questions")
+    parser.add_argument("--think", type=float, default=THINK_TIME, help="average seconds taken to answer")
+    parser.add_argument("--accuracy", type=float, default=ACCURACY, help="fraction of answers that are correct")
+    parser.add_argument("--timeout", type=float, default=LOAD_TIMEOUT, help="seconds to wait for the matches")
+    parser.add_argument("--seed", type=int, help="seed for think times and wrong answers")
+    parser.add_argument("--per-match", action="store_true", help="print the latencies of every match")
+    args = parser.parse_args()
+
+    address = args.address if args.load is None else "127.0.0.1"
+    scoreboard = Scoreboard(args.shards * args.slots)
+    processes = start_shards(args.shards, address, args.port, scoreboard, args.slots)
+    try:
+        if args.load is None:
+            while True:
+                time.sleep(SCOREBOARD_INTERVAL)
+                report_scoreboard(scoreboard)
+        else:
+            for shard in range(args.shards):
+                asyncio.run(wait_for_server(address, args.port + shard))
+            matches, duration = asyncio.run(run_load(address, args.port, args.load, args.players, args.difficulty,
+                                                     args.think, args.accuracy, args.timeout, args.seed,
+                                                     args.shards))
+            report_load(matches, duration, args.per_match)
+            report_scoreboard(scoreboard)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        scoreboard.close()
+        scoreboard.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,609 @@
+"""Networked Trivia Turbo matches, with an authoritative host and clients kept in sync by small deltas.
+
+The host runs each match in a MatchRoom, which deals the questions, scores the answers and
+decides the winner. Clients only send the index of the answer they picked, and the room
+sends back what changed: a new question, a new score or the winner. Every message is a
+few bytes packed with struct, so an answer reaches the other players well within a frame.
+
+The asyncio event loop runs in a background thread. The game's frame clock reads the
+deltas from a queue, so nothing on the network side ever touches tkinter.
+"""
+import asyncio  # Import asyncio for the sockets
+import concurrent.futures  # Import concurrent.futures for waiting on the event loop's thread
+import queue  # Import the queue library to hand deltas to the frame clock
+import socket  # Import the socket library to turn off Nagle's algorithm
+import struct  # Import the struct library for packing messages
+import threading  # Import the threading library for the event loop's thread
+from trivia_engine import DIFFICULTY_OPERATIONS, FINAL_SCORE, Match, get_question_table
+
+
+DEFAULT_PORT = 50512  # Port the host listens on
+MAX_PLAYERS = 8  # Most players a room can hold, one per set of answer keys in the game
+DIFFICULTIES = tuple(DIFFICULTY_OPERATIONS)  # Difficulty levels, indexed by their number in messages
+
+# Message types, sent as the first byte of every message
+JOIN = 1  # Client to host: match id, difficulty, number of players
+ANSWER = 2  # Client to host: index of the answer picked
+WELCOME = 3  # Host to client: the client's player number, difficulty, final score, number of players
+QUESTION = 4  # Host to clients: player, question id, position of the correct answer, wrong answers picked
+SCORE = 5  # Host to clients: player, new score
+WIN = 6  # Host to clients: player who won
+
+# Layout of each message type, all little-endian
+MESSAGES = {
+    JOIN: struct.Struct("<BIBB"),
+    ANSWER: struct.Struct("<BB"),
+    WELCOME: struct.Struct("<BBBBB"),
+    QUESTION: struct.Struct("<BBHBBBB"),
+    SCORE: struct.Struct("<BBB"),
+    WIN: struct.Struct("<BB"),
+}
+
+
+def encode(message_type, *values):
+    """
+    Pack a message.
+
+    Args:
+        message_type (int): The type of message, such as ANSWER.
+        *values: The message's values, in the order of its layout.
+
+    Returns:
+        bytes: The packed message.
+    """
+    return MESSAGES[message_type].pack(message_type, *values)
+
+
+def split_messages(data):
+    """
+    Unpack messages sent one after another.
+
+    Args:
+        data (bytes): The packed messages.
+
+    Yields:
+        tuple: The type and values of each message.
+    """
+    offset = 0
+    while offset < len(data):
+        layout = MESSAGES[data[offset]]
+        yield layout.unpack_from(data, offset)
+        offset += layout.size
+
+
+async def read_message(reader):
+    """
+    Read one message from a stream.
+
+    Args:
+        reader (asyncio.StreamReader): The stream.
+
+    Returns:
+        tuple: The type and values of the message.
+    """
+    message_type = (await reader.readexactly(1))[0]
+    if message_type not in MESSAGES:
+        raise ValueError(f"Unknown message type {message_type}")
+    rest = await reader.readexactly(MESSAGES[message_type].size - 1)
+    return MESSAGES[message_type].unpack(bytes([message_type]) + rest)
+
+
+def valid_join(difficulty, player_count):
+    """
+    Check the values of a JOIN message, which come straight from the network.
+
+    Args:
+        difficulty (int): The number of the difficulty level.
+        player_count (int): The number of players.
+
+    Returns:
+        bool: True if the difficulty exists and the room could hold that many players.
+    """
+    return difficulty < len(DIFFICULTIES) and 2 <= player_count <= MAX_PLAYERS
+
+
+def stop_loop(loop, timeout=1.0):
+    """
+    Cancel the tasks on an event loop running in another thread, then stop it.
+
+    Args:
+        loop (asyncio.AbstractEventLoop): The event loop.
+        timeout (float): The longest time in seconds to wait for the tasks to finish.
+    """
+    async def shutdown():
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()  # Let each connection close its stream
+        await asyncio.gather(*tasks, return_exceptions=True)
+        loop.stop()
+
+    try:
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout)
+    except (concurrent.futures.TimeoutError, concurrent.futures.CancelledError):
+        pass  # The loop stops anyway once shutdown finishes
+
+
+class MatchRoom:
+    """One match on the host, which decides everything and tells the players what changed."""
+
+    def __init__(self, match_id, difficulty, player_count=2, final_score=FINAL_SCORE, seed=None):
+        """
+        Initialize a MatchRoom with no players.
+
+        Args:
+            match_id (int): The id players join the match with.
+            difficulty (str): The difficulty level of the questions.
+            player_count (int): The number of players the match starts with.
+            final_score (int): The score needed to win.
+            seed (int): The seed for the match's questions, or None to pick one at random.
+        """
+        self.match_id = match_id  # Id players join the match with
+        self.player_count = player_count  # Number of players the match waits for
+        self.match = Match(difficulty, final_score, seed=seed)  # Authoritative match
+        self.senders = []  # Function sending bytes to each player, or None once they have left
+        self.on_close = None  # Function called with the room once it is won or everyone has left
+        self.closed = False  # True once the room is won or everyone has left
+
+    def full(self):
+        """
+        Check if every player has joined.
+
+        Returns:
+            bool: True if the match has all its players.
+        """
+        return len(self.senders) >= self.player_count
+
+    def abandoned(self):
+        """
+        Check if a player has left the room.
+
+        Returns:
+            bool: True if any player has disconnected.
+        """
+        return None in self.senders
+
+    def open_to_join(self):
+        """
+        Check if another player can join the room.
+
+        Returns:
+            bool: True if the room isn't over, full or missing a player.
+        """
+        return not self.closed and not self.full() and not self.abandoned()
+
+    def close(self):
+        """Mark the room as over and tell the host, the first time only."""
+        if not self.closed:
+            self.closed = True
+            if self.on_close is not None:
+                self.on_close(self)
+
+    def join(self, send):
+        """
+        Add a player, and deal everyone their first question once the last player has joined.
+
+        Args:
+            send (callable): A function that sends bytes to the player.
+
+        Returns:
+            int: The player's position in the match, or None if the match is full.
+        """
+        if self.full():
+            return None
+        index = len(self.senders)
+        self.senders.append(send)
+        self.match.add_player(f"Player {index + 1}")
+        send(encode(WELCOME, index, DIFFICULTIES.index(self.match.difficulty), self.match.final_score,
+                    self.player_count))
+
+        if self.full():
+            data = b""
+            for player in self.match.players:
+                self.match.generate_question(player)
+                data += self.question_message(player)
+            self.broadcast(data)
+        return index
+
+    def leave(self, index):
+        """
+        Stop sending to a player who has disconnected.
+
+        Args:
+            index (int): The player's position in the match.
+        """
+        self.senders[index] = None
+        if not any(self.senders):
+            self.close()  # Everyone has gone
+
+    def answer(self, index, answer_index):
+        """
+        Score a player's answer and tell everyone their new score and next question, or the winner.
+
+        Args:
+            index (int): The player's position in the match.
+            answer_index (int): The index of the answer they picked.
+        """
+        player = self.match.players[index]
+        if self.match.winner or not 0 <= answer_index < len(player.answers):
+            return  # The match is over, or the answer isn't one of the options
+        self.match.check_answer(player, answer_index)
+
+        data = encode(SCORE, index, player.score)
+        if self.match.winner:
+            data += encode(WIN, index)
+        else:
+            data += self.question_message(player)
+        self.broadcast(data)  # Sent together so they arrive in one packet
+        if self.match.winner:
+            self.close()
+
+    def question_message(self, player):
+        """
+        Pack a player's current question as the question id plus which answers were picked.
+
+        Args:
+            player (PlayerState): The player.
+
+        Returns:
+            bytes: The QUESTION message.
+        """
+        wrong_answers = self.match.questions.table.wrong_answers[player.question_id]
+        correct_position = player.answers.index(player.correct_answer)
+        picked = [wrong_answers.index(answer) for answer in player.answers if answer != player.correct_answer]
+        return encode(QUESTION, player.index, player.question_id, correct_position, *picked)
+
+    def broadcast(self, data):
+        """
+        Send bytes to every player still connected.
+
+        Args:
+            data (bytes): The packed messages.
+        """
+        for send in self.senders:
+            if send is not None:
+                send(data)
+
+
+class NetplayHost:
+    """Host that keeps the match rooms, listening for players over TCP unless it is loopback only."""
+
+    room_class = MatchRoom  # Class of the rooms the host opens
+
+    def __init__(self, port=DEFAULT_PORT, address="0.0.0.0"):
+        """
+        Initialize a NetplayHost instance. Nothing runs until it is started.
+
+        Args:
+            port (int): The port to listen on, or None for a loopback-only host that runs
+                its rooms on the caller's thread.
+            address (str): The address to listen on.
+        """
+        self.port = port  # Port to listen on
+        self.address = address  # Address to listen on
+        self.rooms = {}  # Rooms by match id
+        self.loop = None  # Event loop the rooms run on, once started
+        self.server = None  # Listening server, once started
+
+    def start(self):
+        """Start the event loop thread and listen for players."""
+        if self.port is None:
+            return  # Loopback only, so rooms run on the caller's thread
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self.handle_connection, self.address, self.port)
+            )
+            ready.set()
+            self.loop.run_forever()
+
+        threading.Thread(target=run, name="netplay host", daemon=True).start()
+        ready.wait()
+
+    def call(self, function, *args):
+        """
+        Run a function on the rooms' thread.
+
+        Args:
+            function (callable): The function.
+            *args: The arguments to call it with.
+        """
+        if self.loop is None:
+            function(*args)
+        else:
+            self.loop.call_soon_threadsafe(function, *args)
+
+    def room_for(self, match_id, difficulty, player_count):
+        """
+        Get the room for a match id, opening a new one if there is none, or the last one has
+        finished, is full or has lost a player.
+
+        Args:
+            match_id (int): The id of the match.
+            difficulty (str): The difficulty level, used if a new room is opened.
+            player_count (int): The number of players, used if a new room is opened.
+
+        Returns:
+            MatchRoom: The room, or None if the host can't open another one.
+        """
+        room = self.rooms.get(match_id)
+        if room is None or not room.open_to_join():
+            room = self.room_class(match_id, difficulty, player_count)
+            room.on_close = self.close_room
+            self.rooms[match_id] = room
+        return room
+
+    def close_room(self, room):
+        """
+        Forget a room once it is won or everyone has left, so its match can be freed.
+
+        Args:
+            room (MatchRoom): The room.
+        """
+        if self.rooms.get(room.match_id) is room:
+            del self.rooms[room.match_id]
+
+    async def handle_connection(self, reader, writer):
+        """
+        Put a connecting player in the room they ask for and pass on their answers.
+
+        Args:
+            reader (asyncio.StreamReader): The player's incoming stream.
+            writer (asyncio.StreamWriter): The player's outgoing stream.
+        """
+        writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        room, index = None, None
+        try:
+            message_type, match_id, difficulty, player_count = await read_message(reader)
+            if message_type != JOIN or not valid_join(difficulty, player_count):
+                return
+            room = self.room_for(match_id, DIFFICULTIES[difficulty], player_count)
+            if room is None:
+                return  # The host is full
+            index = room.join(writer.write)
+            if index is None:
+                return
+
+            while True:
+                message = await read_message(reader)
+                if message[0] == ANSWER:
+                    room.answer(index, message[1])
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # The player disconnected or sent something that isn't a message
+        except asyncio.CancelledError:
+            pass  # The host is stopping
+        finally:
+            if index is not None:
+                room.leave(index)
+            writer.close()
+
+    def stop(self):
+        """Stop listening and stop the event loop."""
+        if self.loop is not None:
+            if self.server is not None:
+                self.loop.call_soon_threadsafe(self.server.close)
+            stop_loop(self.loop)
+
+
+class RoomConnection:
+    """A player's side of a room, turning the room's messages into deltas for the frame clock."""
+
+    def __init__(self, match_id=0):
+        """
+        Initialize a RoomConnection that hasn't joined a room yet.
+
+        Args:
+            match_id (int): The id of the match to join.
+        """
+        self.match_id = match_id  # Id of the match to join
+        self.player_index = None  # This player's position in the match, once welcomed
+        self.table = None  # Question table of the match, once welcomed
+        self.incoming = queue.Queue()  # Deltas waiting for the frame clock
+
+    def receive(self, message):
+        """
+        Turn a message from the room into a delta. Called on the network thread.
+
+        The deltas are ('welcome', player, difficulty, final score, number of players), ('question', player,
+        question text, answers, correct answer), ('score', player, score), ('win', player)
+        and ('disconnected',).
+
+        Args:
+            message (tuple): The type and values of the message.
+        """
+        message_type = message[0]
+        if message_type == WELCOME:
+            message_type, index, difficulty, final_score, player_count = message
+            self.player_index = index
+            self.table = get_question_table(DIFFICULTIES[difficulty])
+            self.incoming.put(("welcome", index, DIFFICULTIES[difficulty], final_score, player_count))
+        elif message_type == QUESTION:
+            message_type, index, question_id, correct_position, *picked = message
+            wrong_answers = self.table.wrong_answers[question_id]
+            answers = [wrong_answers[choice] for choice in picked]
+            answers.insert(correct_position, self.table.answers[question_id])
+            self.incoming.put(("question", index, self.table.texts[question_id], answers, self.table.answers[question_id]))
+        elif message_type == SCORE:
+            self.incoming.put(("score", message[1], message[2]))
+        elif message_type == WIN:
+            self.incoming.put(("win", message[1]))
+
+    def receive_bytes(self, data):
+        """
+        Turn packed messages from the room into deltas.
+
+        Args:
+            data (bytes): The packed messages.
+        """
+        for message in split_messages(data):
+            self.receive(message)
+
+    def leave(self):
+        """Leave the room, forgetting any deltas that haven't been taken yet."""
+        self.player_index = None
+        self.poll()
+
+    def poll(self):
+        """
+        Take every delta that has arrived. Called by the frame clock.
+
+        Returns:
+            list: The deltas, oldest first.
+        """
+        deltas = []
+        while True:
+            try:
+                deltas.append(self.incoming.get_nowait())
+            except queue.Empty:
+                return deltas
+
+
+class LoopbackClient(RoomConnection):
+    """Stand-in for a network client that joins a room on a host in the same process."""
+
+    def __init__(self, host, match_id=0):
+        """
+        Initialize a LoopbackClient instance.
+
+        Args:
+            host (NetplayHost): The host whose rooms to join.
+            match_id (int): The id of the match to join.
+        """
+        super().__init__(match_id)
+        self.host = host  # Host whose rooms to join
+        self.room = None  # Room joined, once joined
+        self.index = None  # Position in the room, known on the host's thread
+
+    def join(self, difficulty, player_count=2):
+        """
+        Join the match, opening a room if needed.
+
+        Args:
+            difficulty (str): The difficulty level, used if a new room is opened.
+            player_count (int): The number of players, used if a new room is opened.
+        """
+        self.player_index = None
+        self.host.call(self.join_room, difficulty, player_count)
+
+    def join_room(self, difficulty, player_count):
+        """
+        Join the room. Runs on the host's thread.
+
+        Args:
+            difficulty (str): The difficulty level.
+            player_count (int): The number of players.
+        """
+        self.room = self.host.room_for(self.match_id, difficulty, player_count)
+        self.index = self.room.join(self.receive_bytes)
+
+    def leave(self):
+        """Give up this player's seat in the room."""
+        self.host.call(self.leave_room)
+        super().leave()
+
+    def leave_room(self):
+        """Leave the room. Runs on the host's thread, after any join still waiting to run."""
+        if self.room is not None and self.index is not None:
+            self.room.leave(self.index)
+        self.room, self.index = None, None
+
+    def send_answer(self, answer_index):
+        """
+        Send the index of the answer this player picked.
+
+        Args:
+            answer_index (int): The index of the answer.
+        """
+        self.host.call(lambda: self.room.answer(self.index, answer_index))
+
+    def close(self):
+        """Leave the room and stop the host."""
+        self.host.stop()
+
+
+class NetClient(RoomConnection):
+    """Client that joins a room on another machine over TCP, from an event loop in a background thread."""
+
+    def __init__(self, address, port=DEFAULT_PORT, match_id=0):
+        """
+        Initialize a NetClient instance and start its event loop thread.
+
+        Args:
+            address (str): The host's address.
+            port (int): The host's port.
+            match_id (int): The id of the match to join.
+        """
+        super().__init__(match_id)
+        self.address = address  # Host's address
+        self.port = port  # Host's port
+        self.writer = None  # Stream to the host, once connected
+        self.loop = asyncio.new_event_loop()  # Event loop the connection runs on
+        threading.Thread(target=self.loop.run_forever, name="netplay client", daemon=True).start()
+
+    def join(self, difficulty, player_count=2):
+        """
+        Connect to the host and join the match, opening a room there if needed.
+
+        Args:
+            difficulty (str): The difficulty level, used if a new room is opened.
+            player_count (int): The number of players, used if a new room is opened.
+        """
+        self.player_index = None
+        asyncio.run_coroutine_threadsafe(self.connect(difficulty, player_count), self.loop)
+
+    async def connect(self, difficulty, player_count):
+        """
+        Connect, join, and turn the host's messages into deltas until the connection closes.
+
+        Args:
+            difficulty (str): The difficulty level.
+            player_count (int): The number of players.
+        """
+        if self.writer is not None:
+            last_writer, self.writer = self.writer, None
+            last_writer.close()  # Leave the last match
+
+        writer = None
+        try:
+            reader, writer = await asyncio.open_connection(self.address, self.port)
+            writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.writer = writer
+            writer.write(encode(JOIN, self.match_id, DIFFICULTIES.index(difficulty), player_count))
+            while True:
+                self.receive(await read_message(reader))
+        except (asyncio.IncompleteReadError, ConnectionError, OSError, ValueError):
+            if writer is None or writer is self.writer:
+                self.incoming.put(("disconnected",))  # Lost the host, rather than leaving for a new match
+
+    def send_answer(self, answer_index):
+        """
+        Send the index of the answer this player picked.
+
+        Args:
+            answer_index (int): The index of the answer.
+        """
+        self.loop.call_soon_threadsafe(self.write, encode(ANSWER, answer_index))
+
+    def write(self, data):
+        """
+        Write bytes to the host. Runs on the event loop's thread.
+
+        Args:
+            data (bytes): The bytes to write.
+        """
+        if self.writer is not None:
+            self.writer.write(data)
+
+    def leave(self):
+        """Disconnect from the host, which gives up this player's seat."""
+        writer, self.writer = self.writer, None  # Leaving, not losing the host
+        if writer is not None:
+            self.loop.call_soon_threadsafe(writer.close)
+        super().leave()
+
+    def close(self):
+        """Disconnect and stop the event loop."""
+        self.writer = None  # Closing is leaving, not losing the host
+        stop_loop(self.loop)
@@ -0,0 +1,239 @@
+"""Compact binary logs of Trivia Turbo matches, and a headless replayer for them.
+
+Run with:
+    python replay_log.py match.ttr    Replay a saved match and print its result
+
+A log starts with a header holding the difficulty, final score, seed and player names,
+followed by one fixed-size record per event: the time in milliseconds since the match
+started, the event type, the player's position and the event's value.
+"""
+import os  # Import the os library for file paths
+import struct  # Import the struct library for packing the binary records
+import sys  # Import the sys library for command line arguments
+import time  # Import the time library for timing the replay
+from trivia_engine import DIFFICULTY_OPERATIONS, EVENT_ANSWER, EVENT_NEXT_QUESTION, EVENT_QUESTION, Match
+
+
+MAGIC = b"TTRL"  # First bytes of every log file
+VERSION = 1  # Version of the log format
+HEADER = struct.Struct("<4sBBBBI")  # Magic, version, difficulty, final score, player count, seed
+EVENT = struct.Struct("<IBBH")  # Milliseconds since the start, event type, player, value
+DIFFICULTIES = tuple(DIFFICULTY_OPERATIONS)  # Difficulty levels, indexed by their number in the header
+REPLAY_DIRECTORY = "replays"  # Folder the game saves replays in
+
+
+class ReplayMismatch(Exception):
+    """Raised when replaying a log deals different questions from the ones it recorded."""
+
+
+class ReplayLog:
+    """Log of every question and answer in one match, packed into bytes as it is recorded."""
+
+    def __init__(self, clock=time.monotonic):
+        """
+        Initialize an empty ReplayLog. The match it is given to fills in the header.
+
+        Args:
+            clock (callable): The function giving the time in seconds, used for timestamps.
+        """
+        self.clock = clock  # Clock the timestamps are read from
+        self.start = clock()  # Time the match started
+        self.difficulty = None  # Difficulty level of the match
+        self.final_score = None  # Score needed to win the match
+        self.seed = None  # Seed of the match's random number generator
+        self.player_names = []  # Names of the players, in the order they joined
+        self.data = bytearray()  # Packed event records
+
+    def begin(self, difficulty, final_score, seed):
+        """
+        Record the settings of the match. Called by the match when it is created.
+
+        Args:
+            difficulty (str): The difficulty level of the match.
+            final_score (int): The score needed to win the match.
+            seed (int): The seed of the match's random number generator.
+        """
+        if seed is None:
+            raise ValueError("Only a match with its own seed can be logged")
+        self.difficulty = difficulty
+        self.final_score = final_score
+        self.seed = seed
+        self.start = self.clock()
+
+    def add_player(self, name):
+        """
+        Record a player joining the match.
+
+        Args:
+            name (str): The name of the player.
+        """
+        self.player_names.append(name)
+
+    def record(self, event_type, player_index, value):
+        """
+        Record an event at the current time.
+
+        Args:
+            event_type (int): The type of event, such as EVENT_ANSWER.
+            player_index (int): The position of the player in the match.
+            value (int): The question id or answer index.
+        """
+        milliseconds = int((self.clock() - self.start) * 1000)
+        self.data += EVENT.pack(milliseconds, event_type, player_index, value)
+
+    def events(self):
+        """
+        Iterate over the recorded events.
+
+        Yields:
+            tuple: The milliseconds since the start, event type, player position and value.
+        """
+        return EVENT.iter_unpack(self.data)
+
+    def __len__(self):
+        """
+        Get the number of recorded events.
+
+        Returns:
+            int: The number of events.
+        """
+        return len(self.data) // EVENT.size
+
+    def duration(self):
+        """
+        Get how long the match had run for at its last event.
+
+        Returns:
+            float: The time in seconds of the last event, or 0 if there are none.
+        """
+        if not self.data:
+            return 0.0
+        return EVENT.unpack_from(self.data, len(self.data) - EVENT.size)[0] / 1000
+
+    def to_bytes(self):
+        """
+        Pack the log into bytes.
+
+        Returns:
+            bytes: The header, the player names and the event records.
+        """
+        header = HEADER.pack(MAGIC, VERSION, DIFFICULTIES.index(self.difficulty), self.final_score,
+                             len(self.player_names), self.seed)
+        names = b"".join(bytes([len(encoded)]) + encoded for encoded in (name.encode() for name in self.player_names))
+        return header + names + bytes(self.data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Unpack a log from bytes.
+
+        Args:
+            data (bytes): The packed log.
+
+        Returns:
+            ReplayLog: The log.
+        """
+        magic, version, difficulty, final_score, player_count, seed = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a Trivia Turbo replay log, or one from a different version")
+
+        log = cls(clock=lambda: 0.0)
+        log.difficulty, log.final_score, log.seed = DIFFICULTIES[difficulty], final_score, seed
+        offset = HEADER.size
+        for _ in range(player_count):
+            length = data[offset]
+            log.player_names.append(data[offset + 1:offset + 1 + length].decode())
+            offset += 1 + length
+        log.data = bytearray(data[offset:])
+        return log
+
+    def save(self, path):
+        """
+        Save the log to a file.
+
+        Args:
+            path (str): The path of the file.
+        """
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a log from a file.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            ReplayLog: The log.
+        """
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+    def write_batch(self, items):
+        """
+        Save queued copies of the log. Called on the background writer thread.
+
+        Args:
+            items (list): The queued (path, packed log) pairs.
+        """
+        for path, data in items:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(data)
+
+
+def replay(log):
+    """
+    Play a logged match again, as fast as possible, checking it deals the same questions.
+
+    Args:
+        log (ReplayLog): The log to replay.
+
+    Returns:
+        Match: The replayed match, with its scores and winner.
+    """
+    match = Match(log.difficulty, log.final_score, seed=log.seed)
+    for name in log.player_names:
+        match.add_player(name)
+
+    for milliseconds, event_type, player_index, value in log.events():
+        player = match.players[player_index]
+        if event_type == EVENT_QUESTION:
+            match.generate_question(player)
+        elif event_type == EVENT_ANSWER:
+            match.check_answer(player, value)
+            continue  # The answer deals the next question, checked by the next event
+        elif event_type != EVENT_NEXT_QUESTION:
+            raise ValueError(f"Unknown event type {event_type} at {milliseconds} ms")
+
+        if player.question_id != value:
+            raise ReplayMismatch(f"{player.name} was dealt question {player.question_id} "
+                                 f"instead of {value} at {milliseconds} ms")
+    return match
+
+
+def main():
+    """Replay the log files given on the command line and print their results."""
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    for path in sys.argv[1:]:
+        log = ReplayLog.load(path)
+        start = time.perf_counter()
+        match = replay(log)
+        replay_time = time.perf_counter() - start
+
+        scores = ", ".join(f"{player.name}: {player.score}" for player in match.players)
+        print(f"{path}: {log.difficulty}, seed {log.seed}, {len(log)} events")
+        print(f"  Winner: {match.winner or 'nobody'} ({scores})")
+        speedup = log.duration() / replay_time if replay_time else float("inf")
+        print(f"  Played for {log.duration():.1f} s, replayed in {replay_time * 1000:.1f} ms ({speedup:.0f}x real time)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""Headless match rules for Trivia Turbo, with no dependency on tkinter."""
+import random  # Import the random library for generating random numbers
+from array import array  # Import compact arrays for the question tables
+
+
+FINAL_SCORE = 12  # The score needed to win the game
+
+# Operations each difficulty can ask questions about
+DIFFICULTY_OPERATIONS = {
+    "easy": ("+",),
+    "medium": ("+", "-"),
+    "hard": ("+", "-", "*", "/"),
+}
+OPERAND_RANGE = range(1, 11)  # Numbers that can appear in a question
+WRONG_ANSWER_COUNT = 3  # Number of wrong answers shown next to the correct one
+DIVISION_PLACES = 2  # Decimal places division answers are rounded to
+SEED_LIMIT = 2 ** 32  # Seeds must be below this, so they fit in a replay log's header
+
+# Events a match records in its log, if it has one
+EVENT_QUESTION = 1  # A question was dealt to a player; the value is its question id
+EVENT_ANSWER = 2  # A player answered; the value is the index of the answer they picked
+EVENT_NEXT_QUESTION = 3  # The next question was dealt after an answer; the value is its question id
+
+
+def calculate(num1, operation, num2):
+    """
+    Calculate the answer to a question.
+
+    Args:
+        num1 (int): The first number.
+        operation (str): The operation ('+', '-', '*', '/').
+        num2 (int): The second number.
+
+    Returns:
+        int or float: The answer, with division rounded to DIVISION_PLACES.
+    """
+    if operation == "+":
+        return num1 + num2
+    elif operation == "-":
+        return num1 - num2
+    elif operation == "*":
+        return num1 * num2
+    elif operation == "/":
+        return round(num1 / num2, DIVISION_PLACES)
+
+
+def plausible_wrong_answers(num1, operation, num2, answer):
+    """
+    List wrong answers a student could plausibly give, most plausible first.
+
+    The list always has at least WRONG_ANSWER_COUNT answers, all of the same type as the
+    correct answer, so a float answer is never the only float among the options.
+
+    Args:
+        num1 (int): The first number.
+        operation (str): The operation ('+', '-', '*', '/').
+        num2 (int): The second number.
+        answer (int or float): The correct answer.
+
+    Returns:
+        tuple: The wrong answers, without duplicates.
+    """
+    candidates = []
+    if operation == "/":
+        # Dividing by a neighbouring number, or the numbers the wrong way round
+        if num2 > 1:
+            candidates.append(num1 / (num2 - 1))
+        candidates += [num1 / (num2 + 1), (num1 + 1) / num2, num2 / num1]
+    candidates += [answer + 1, answer - 1]  # Off by one
+
+    # Digit swap, such as 21 for 12
+    if isinstance(answer, int) and abs(answer) >= 10:
+        swapped = int(str(abs(answer))[::-1])
+        candidates.append(swapped if answer > 0 else -swapped)
+
+    # Using the wrong operation
+    for other_operation in ("+", "-", "*", "/"):
+        if other_operation != operation:
+            candidates.append(calculate(num1, other_operation, num2))
+
+    candidates += [answer + 2, answer - 2]  # Off by two
+    offset = 3
+    while len(set(candidates) - {answer}) < WRONG_ANSWER_COUNT:
+        candidates += [answer + offset, answer - offset]  # Further off, only if still short of options
+        offset += 1
+
+    # Match the type of the correct answer and drop duplicates
+    wrong_answers = []
+    for candidate in candidates:
+        if isinstance(answer, float):
+            candidate = round(float(candidate), DIVISION_PLACES)
+        elif candidate != int(candidate):
+            continue  # A fraction would give away a whole number answer
+        else:
+            candidate = int(candidate)
+        if candidate != answer and candidate not in wrong_answers:
+            wrong_answers.append(candidate)
+    return tuple(wrong_answers)
+
+
+class QuestionTable:
+    """Every question for one difficulty, enumerated once into parallel arrays."""
+
+    def __init__(self, difficulty):
+        """
+        Initialize a QuestionTable by enumerating every question for a difficulty.
+
+        Args:
+            difficulty (str): The difficulty level of the questions ('easy', 'medium', 'hard').
+        """
+        self.difficulty = difficulty  # Difficulty level of the questions
+        self.operations = DIFFICULTY_OPERATIONS[difficulty]  # Operations used, indexed by operation_ids
+        self.first_numbers = array("b")  # First number of each question
+        self.operation_ids = array("b")  # Index into operations of each question
+        self.second_numbers = array("b")  # Second number of each question
+        self.answers = []  # Correct answer of each question
+        self.wrong_answers = []  # Plausible wrong answers of each question
+        self.texts = []  # Display text of each question
+
+        for operation_id, operation in enumerate(self.operations):
+            for num1 in OPERAND_RANGE:
+                for num2 in OPERAND_RANGE:
+                    answer = calculate(num1, operation, num2)
+                    self.first_numbers.append(num1)
+                    self.operation_ids.append(operation_id)
+                    self.second_numbers.append(num2)
+                    self.answers.append(answer)
+                    self.wrong_answers.append(plausible_wrong_answers(num1, operation, num2, answer))
+                    self.texts.append(f"What is {num1} {operation} {num2}?")
+
+    def __len__(self):
+        """
+        Get the number of questions in the table.
+
+        Returns:
+            int: The number of questions.
+        """
+        return len(self.answers)
+
+    def rows(self):
+        """
+        Iterate over every question, such as for bulk export.
+
+        Yields:
+            tuple: The first number, operation, second number, answer and text of a question.
+        """
+        for question_id in range(len(self)):
+            yield (
+                self.first_numbers[question_id],
+                self.operations[self.operation_ids[question_id]],
+                self.second_numbers[question_id],
+                self.answers[question_id],
+                self.texts[question_id],
+            )
+
+
+# Question tables are built once per process and shared by every match
+question_tables = {}
+
+
+def get_question_table(difficulty):
+    """
+    Get the shared question table for a difficulty, building it on first use.
+
+    Args:
+        difficulty (str): The difficulty level of the questions.
+
+    Returns:
+        QuestionTable: The table of every question for the difficulty.
+    """
+    if difficulty not in question_tables:
+        question_tables[difficulty] = QuestionTable(difficulty)
+    return question_tables[difficulty]
+
+
+class QuestionDeck:
+    """A shuffled deck of question ids that deals each question once before reshuffling."""
+
+    def __init__(self, table, rng=random):
+        """
+        Initialize a QuestionDeck instance.
+
+        Args:
+            table (QuestionTable): The table of questions to deal from.
+            rng (random.Random): The random number generator used for shuffling.
+        """
+        self.table = table  # Table of questions to deal from
+        self.rng = rng  # Random number generator for shuffling
+        self.order = []  # Question ids left to deal, dealt from the end
+
+    def draw(self):
+        """
+        Deal the next question id, reshuffling once every question has been dealt.
+
+        Returns:
+            int: The id of the question in the table.
+        """
+        if not self.order:
+            self.order = list(range(len(self.table)))
+            self.rng.shuffle(self.order)
+        return self.order.pop()
+
+
+class PlayerState:
+    """Score and current question of one player in a match."""
+
+    def __init__(self, name):
+        """
+        Initialize a PlayerState instance.
+
+        Args:
+            name (str): The name of the player.
+        """
+        self.name = name  # Player's name
+        self.score = 0  # Player's score
+        self.index = None  # Position of the player in the match, set when they join
+        self.question_id = None  # Id of the current question in the question table
+        self.question = ""  # Text of the current question
+        self.correct_answer = None  # Correct answer to the current question
+        self.answers = []  # Answer options for the current question, in display order
+
+
+class Match:
+    """A match between players answering questions until one reaches the final score."""
+
+    def __init__(self, difficulty, final_score=FINAL_SCORE, rng=None, seed=None, log=None):
+        """
+        Initialize a Match instance.
+
+        A match seeded with the same seed deals the same questions in the same order, so it
+        can be played again from a log of its answers.
+
+        Args:
+            difficulty (str): The difficulty level of the questions ('easy', 'medium', 'hard').
+            final_score (int): The score needed to win the match.
+            rng (random.Random): The random number generator used for questions, or None for
+                a new one seeded with `seed`.
+            seed (int): The seed for the match's own random number generator, from 0 up to
+                SEED_LIMIT, or None to pick one at random. Ignored if `rng` is given.
+            log (ReplayLog): A log to record every question and answer in, or None.
+        """
+        if rng is None:
+            if seed is None:
+                seed = random.randrange(SEED_LIMIT)  # Pick a seed so the match can still be replayed
+            elif not 0 <= seed < SEED_LIMIT:
+                raise ValueError(f"A seed must be from 0 to {SEED_LIMIT - 1}, not {seed}")
+            rng = random.Random(seed)
+        else:
+            seed = None  # The match can't be replayed from a shared generator
+        self.difficulty = difficulty  # Difficulty level of the questions
+        self.final_score = final_score  # Score needed to win
+        self.seed = seed  # Seed of the match's random number generator, if it has its own
+        self.rng = rng  # Random number generator for questions
+        self.log = log  # Log of the match's questions and answers
+        if log is not None:
+            log.begin(difficulty, final_score, seed)
+        self.questions = QuestionDeck(get_question_table(difficulty), rng)  # Questions dealt in this match
+        self.players = []  # States of the players in the match
+        self.winner = None  # Name of the winner, once there is one
+
+    def add_player(self, name):
+        """
+        Add a player to the match.
+
+        Args:
+            name (str): The name of the player.
+
+        Returns:
+            PlayerState: The new player's state.
+        """
+        player = PlayerState(name)
+        player.index = len(self.players)
+        self.players.append(player)
+        if self.log is not None:
+            self.log.add_player(name)
+        return player
+
+    def generate_question(self, player):
+        """
+        Generate a new math question and answer options for a player.
+
+        Args:
+            player (PlayerState): The player to generate the question for.
+        """
+        if self.winner:  # If the match is won, don't generate more questions
+            return
+
+        self.deal_question(player)
+        if self.log is not None:
+            self.log.record(EVENT_QUESTION, player.index, player.question_id)
+
+    def deal_question(self, player):
+        """
+        Deal the next question from the deck to a player, with answer options in a random order.
+
+        Args:
+            player (PlayerState): The player to deal the question to.
+        """
+        # Deal the next question from the match's deck
+        table = self.questions.table
+        player.question_id = self.questions.draw()
+        player.correct_answer = table.answers[player.question_id]
+        player.question = table.texts[player.question_id]
+
+        # Pick wrong answers from the question's plausible ones, without repeats
+        wrong_answers = table.wrong_answers[player.question_id]
+        answers = [player.correct_answer] + self.rng.sample(wrong_answers, WRONG_ANSWER_COUNT)
+
+        self.rng.shuffle(answers)  # Shuffle the answers to randomize their order
+        player.answers = answers
+
+    def check_answer(self, player, index):
+        """
+        Check a player's answer, update their score and give them the next question.
+
+        Args:
+            player (PlayerState): The player who answered.
+            index (int): The index of the selected answer.
+
+        Returns:
+            int: The change in the player's score (1, -1 or 0), or None if the match was already won.
+        """
+        if self.winner:  # If the match is won, don't check answers
+            return None
+        if self.log is not None:
+            self.log.record(EVENT_ANSWER, player.index, index)
+
+        change = 0
+        if player.answers[index] == player.correct_answer:  # Check if selected answer is correct
+            change = 1  # Increase score on correct answer
+            if player.score + change == self.final_score:  # Check if player reached final score
+                self.winner = player.name  # Declare this player as the winner
+        elif player.score > 0:
+            change = -1  # Decrease score on incorrect answer
+        player.score += change
+
+        if not self.winner:
+            self.deal_question(player)  # Deal a new question
+            if self.log is not None:
+                self.log.record(EVENT_NEXT_QUESTION, player.index, player.question_id)
+        return change
+
+
+def simulate_match(difficulty, player_count=2, accuracy=0.75, rng=random, seed=None, log=None):
+    """
+    Play a whole match with bots that answer correctly some of the time.
+
+    Args:
+        difficulty (str): The difficulty level of the questions.
+        player_count (int): The number of bots in the match.
+        accuracy (float): The chance of each bot picking the correct answer.
+        rng (random.Random): The random number generator used for the bots.
+        seed (int): The seed for the match's questions, or None to pick one with `rng`.
+        log (ReplayLog): A log to record the match in, or None.
+
+    Returns:
+        Match: The finished match.
+    """
+    if seed is None:
+        seed = rng.randrange(SEED_LIMIT)
+    match = Match(difficulty, seed=seed, log=log)
+    for number in range(1, player_count + 1):
+        match.generate_question(match.add_player(f"Player {number}"))
+
+    while not match.winner:
+        player = rng.choice(match.players)  # A random bot answers next
+        if rng.random() < accuracy:
+            index = player.answers.index(player.correct_answer)
+        else:
+            index = rng.randrange(len(player.answers))
+        match.check_answer(player, index)
+    return match
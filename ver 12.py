@@ -1,18 +1,28 @@
-import tkinter as tk  # Import the tkinter library for GUI elements
-import random  # Import the random library for generating random numbers
-import json  # Import the json library for handling JSON data
-import os  # Import the os library for interacting with the operating system
+import time  # Import the time library for the monotonic frame clock and startup timer
+import_start = time.perf_counter()  # Time the import started, for the startup report
 
+import os  # Import the os library for reading environment settings
+import random  # Import the random library for generating random numbers
+import sys  # Import the sys library for reading command line options
+from collections import deque  # Import deque to keep the most recent input latencies
+from array import array  # Import compact arrays for the positions of canvas items
+
+# Use the in-memory stand-in for tkinter when running without a display
+if os.environ.get("TRIVIA_TURBO_BACKEND") == "fake":
+    import fake_tk as tk  # Import the headless stand-in for tkinter
+    monotonic = tk.monotonic  # Frame clock follows the stand-in's virtual time
+else:
+    import tkinter as tk  # Import the tkinter library for GUI elements
+    monotonic = time.monotonic  # Frame clock follows real time
+from trivia_engine import FINAL_SCORE, SEED_LIMIT, Match  # Import the headless match rules
+from account_store import open_account_store  # Import the account storage backends
+from background_writer import get_writer  # Import the shared background writer, for saving replays
+from replay_log import REPLAY_DIRECTORY, ReplayLog  # Import the match logs that can be replayed
+from netplay import DEFAULT_PORT, LoopbackClient, NetClient, NetplayHost  # Import networked matches
 
-# Account Data
-account_data_file = "account_data.json"  # File to store account data
 
-# Load existing account data if it exists, otherwise create an empty dictionary
-if os.path.exists(account_data_file):  # Check if the account data file exists
-    with open(account_data_file, "r") as file:  # Open the account data file in read mode
-        accounts = json.load(file)  # Load the accounts from the JSON file
-else:
-    accounts = {}  # Initialize an empty dictionary for accounts
+# Account Data, opened on first login rather than at import
+accounts = open_account_store()
 
 # Constants
 RESOLUTION = 1000, 800  # Resolution of the game window
@@ -23,7 +33,768 @@ CAR_UP_TOTAL_MOVE, CAR_DOWN_TOTAL_MOVE = 50, 50  # Total movement distance for c
 SMALL_TEXT_FONT = ("Terminal", 12)  # Font for small text
 NORMAL_TEXT_FONT = ("Terminal", 18)  # Font for normal text
 TITLE_TEXT_FONT = ("Terminal", 20)  # Font for title text
-FINAL_SCORE = 12  # The score needed to win the game
+
+# Animation speeds in pixels per second, matching the original per-tick steps
+TIME_BASED_ANIMATION = True  # Move by elapsed time instead of a fixed step per frame
+MAX_FRAME_TIME = 0.25  # Longest time in seconds a single frame may advance the animation by
+LINE_SPEED = LINE_STEP * 1000 / ANIMATION_DELAY  # Speed of the road and finish line
+CAR_UP_SPEED = CAR_MOVE_STEP * 1000 / ANIMATION_DELAY  # Speed of a car moving up
+CAR_DOWN_SPEED = CAR_MOVE_STEP * 1000 / 200  # Speed of a car moving down slowly
+CAR_DRIVE_SPEED = 10 * 1000 / ANIMATION_DELAY  # Speed of cars driving onto the road and of NPCs
+CAR_BASE_Y = 700  # The y-coordinate cars drive up to at the start of a game
+LINE_SPACING = 100  # Distance between the start of one road line and the next
+FINISH_LINE_Y = -100  # The y-coordinate of the top of the finish line before it moves
+ROAD_RENDERING = "dash"  # 'dash' for one dashed line per lane and a finish line image, 'items' for separate items
+
+# NPC Cars
+NPC_POOL_SIZE = 6  # Most NPC cars kept driving on the road at once
+NPC_RECYCLE_Y = -2000  # NPC cars above this y-coordinate are recycled
+NPC_RESPAWN_Y = 900  # The y-coordinate recycled NPC cars reappear at, below the screen
+NPC_LANES = (125, 275)  # The x-coordinates NPC cars can reappear in
+
+# Startup
+DEFERRED_STARTUP = True  # Show the login screen before loading images, the road and the animations
+STARTUP_BUDGET_MS = 500  # Time in milliseconds the login screen should take to appear
+
+# Idle throttling
+IDLE_THROTTLING = True  # Slow or stop the frame clock when nothing needs animating
+IDLE_FRAME_DELAY = 200  # Delay in milliseconds between frames while the window is unfocused
+IDLE_TIMEOUT = 10  # Seconds without input before background animation stops
+PRIORITY_INPUT = 0  # Run priority of updates that handle input or move the round on
+PRIORITY_VIEW = 1  # Run priority of the update that shows the results on screen
+PRIORITY_NORMAL = 2  # Run priority of the race's own updates
+PRIORITY_AMBIENT = 3  # Run priority of background animation
+
+# Quality governor
+QUALITY_GOVERNOR = True  # Cut back on eye candy when frames take too long
+FRAME_BUDGET_MS = ANIMATION_DELAY / 2  # Time in milliseconds a frame may take, leaving the rest for input
+QUALITY_SMOOTHING = 0.1  # Weight of the newest frame in the average frame time
+QUALITY_HOLD_TIME = 2  # Seconds to wait after changing quality before lowering it again
+QUALITY_RESTORE_TIME = 5  # Seconds to wait after changing quality before raising it again
+QUALITY_RESTORE_FRACTION = 0.5  # Quality is raised once frames take less than this fraction of the budget
+QUALITY_LEVELS = 4  # Number of quality levels, from 0 (everything) to 3 (least eye candy)
+LOW_QUALITY_ROAD_INTERVAL = 100  # Milliseconds between road updates at quality level 2 and below
+
+# Replays
+SAVE_REPLAYS = False  # Save a replay log of every match into REPLAY_DIRECTORY
+
+# Input
+LATENCY_SAMPLES = 1000  # Number of recent key-to-label latencies kept for the input report
+
+# Players, in the order they join: name, answer keys, car image and side car image
+PLAYER_CONFIGS = (
+    ("Player 1", ("q", "w", "e", "r"), "cars/car1.png", "cars/carside1.png"),
+    ("Player 2", ("u", "i", "o", "p"), "cars/car2.png", "cars/carside2.png"),
+    ("Player 3", ("a", "s", "d", "f"), "cars/car1.png", "cars/carside1.png"),
+    ("Player 4", ("h", "j", "k", "l"), "cars/car2.png", "cars/carside2.png"),
+    ("Player 5", ("z", "x", "c", "v"), "cars/car1.png", "cars/carside1.png"),
+    ("Player 6", ("b", "n", "m", "comma"), "cars/car2.png", "cars/carside2.png"),
+    ("Player 7", ("1", "2", "3", "4"), "cars/car1.png", "cars/carside1.png"),
+    ("Player 8", ("7", "8", "9", "0"), "cars/car2.png", "cars/carside2.png"),
+)
+PLAYER_COUNT = 2  # Number of players in a game
+MIN_PLAYERS, MAX_PLAYERS = 2, len(PLAYER_CONFIGS)  # Fewest and most players a game can have
+CAR_START_Y = 1000  # The y-coordinate cars start at, below the screen
+ROAD_CENTER_X = 200  # The x-coordinate of the middle of the road
+LANE_WIDTH = 50  # Widest gap between the lanes of neighbouring players
+
+# Images decoded once when the game starts
+ASSET_FILES = (
+    "cars/background.png",
+    "cars/car1.png",
+    "cars/car2.png",
+    "cars/carside1.png",
+    "cars/carside2.png",
+)
+
+
+class FrameScheduler:
+    """Single frame clock that runs every registered update once per frame."""
+
+    def __init__(self, root, frame_delay=ANIMATION_DELAY, time_based=TIME_BASED_ANIMATION,
+                 idle_throttling=IDLE_THROTTLING):
+        """
+        Initialize a FrameScheduler instance.
+
+        Args:
+            root (tk.Tk): The window whose after() timer drives the frames.
+            frame_delay (int): The delay in milliseconds between frames.
+            time_based (bool): True to advance updates by the real elapsed time, False to
+                advance them by exactly one frame_delay per frame.
+            idle_throttling (bool): True to slow the clock while the window is unfocused and
+                stop it while the window is hidden or only ambient updates are left.
+        """
+        self.root = root  # Reference to the window that owns the timer
+        self.frame_delay = frame_delay  # Delay between frames
+        self.time_based = time_based  # Whether updates see real elapsed time
+        self.updates = {}  # Registered updates in the order they run each frame
+        self.frame_count = 0  # Number of frames run so far
+        self.frame_cost = 0.0  # Time in seconds the last frame took to run
+        self.frame_lateness = 0.0  # Time in seconds the last frame started after it was due
+        self.frames_skipped = 0  # Number of frames dropped because the timer fired late
+        self.clock = 0.0  # Animation time in seconds that has passed on the frame clock
+        self.last_tick_time = None  # Monotonic time of the last frame
+        self.next_frame_time = None  # Monotonic time the next frame is due
+        self.next_name = 0  # Counter used to name updates registered without a name
+        self.after_id = None  # Id of the pending after() call, if the clock is running
+        self.running = False  # Whether the clock has been started, even if it is asleep
+        self.idle_throttling = idle_throttling  # Whether the clock slows down and sleeps when idle
+        self.hidden = False  # Whether the window is minimized or otherwise not shown
+        self.focused = True  # Whether the window has the keyboard focus
+        self.last_wake_time = monotonic()  # Monotonic time of the last input or new essential update
+        self.sleep_start = None  # Monotonic time the clock went to sleep, while it is asleep
+        self.frame_cost_total = 0.0  # Time in seconds every frame so far took to run
+        self.frames_saved = 0.0  # Number of frames that weren't run because the clock was idle
+        self.time_asleep = 0.0  # Time in seconds the clock has spent asleep
+
+    def register(self, callback, interval=0, name=None, ambient=False, priority=None):
+        """
+        Register an update to run on the frame clock.
+
+        The callback is called with the time in seconds since it last ran, at most once per
+        frame and no more often than every `interval` milliseconds. It may return False to
+        remove itself. Registering again with the same name replaces the existing update.
+
+        Ambient updates, like the scrolling road, don't keep the clock awake: once only
+        ambient updates are left and there has been no input for IDLE_TIMEOUT seconds, the
+        clock sleeps until it is woken.
+
+        Each frame runs the updates in order of priority, then in the order they were
+        registered, so eye candy can't hold up what the players are waiting on.
+
+        Args:
+            callback (callable): The function to call with the elapsed time.
+            interval (int): The minimum number of milliseconds between calls.
+            name (str): The name of the update, or None to generate a unique one.
+            ambient (bool): True if the update is background animation that can stop when idle.
+            priority (int): When the update runs in each frame, lowest first, such as
+                PRIORITY_INPUT, or None for PRIORITY_AMBIENT if it is ambient and
+                PRIORITY_NORMAL if not.
+
+        Returns:
+            str: The name the update was registered under.
+        """
+        if name is None:
+            self.next_name += 1  # Generate a unique name for the update
+            name = f"update {self.next_name}"
+        self.updates.pop(name, None)  # Re-registering moves the update to the end of the order
+        if priority is None:
+            priority = PRIORITY_AMBIENT if ambient else PRIORITY_NORMAL
+        # Callback, period, time it last ran, ambient, priority
+        self.updates[name] = [callback, interval / 1000, self.clock, ambient, priority]
+        if not ambient:
+            self.wake()  # Something needs animating
+        return name
+
+    def unregister(self, name):
+        """
+        Remove an update from the frame clock.
+
+        Args:
+            name (str): The name of the update to remove.
+        """
+        self.updates.pop(name, None)
+
+    def is_registered(self, name):
+        """
+        Check if an update is registered.
+
+        Args:
+            name (str): The name of the update.
+
+        Returns:
+            bool: True if the update is registered, False otherwise.
+        """
+        return name in self.updates
+
+    def start(self):
+        """Start the frame clock if it is not already running."""
+        self.running = True
+        if self.after_id is None:
+            self.last_tick_time = monotonic()
+            self.next_frame_time = self.last_tick_time + self.frame_delay / 1000
+            self.after_id = self.root.after(self.frame_delay, self.tick)
+
+    def stop(self):
+        """Stop the frame clock."""
+        self.running = False
+        self.sleep_start = None
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def wake(self):
+        """Note that there was input or new work, and restart the clock if it is asleep."""
+        now = monotonic()
+        self.last_wake_time = now
+        if self.sleep_start is not None and not self.hidden:
+            # Count the frames that didn't run while asleep, then carry on from where the clock stopped
+            self.time_asleep += now - self.sleep_start
+            self.frames_saved += (now - self.sleep_start) / (self.frame_delay / 1000)
+            self.sleep_start = None
+            self.start()
+
+    def set_hidden(self, hidden):
+        """
+        Record whether the window is hidden. A hidden window's clock sleeps.
+
+        Args:
+            hidden (bool): True if the window is minimized or otherwise not shown.
+        """
+        self.hidden = hidden
+        if not hidden:
+            self.wake()
+
+    def set_focused(self, focused):
+        """
+        Record whether the window has the keyboard focus. An unfocused window's clock runs slower.
+
+        Args:
+            focused (bool): True if the window has the focus.
+        """
+        self.focused = focused
+        if focused:
+            self.wake()
+
+    def is_idle(self, now):
+        """
+        Check if the clock can go to sleep.
+
+        Args:
+            now (float): The monotonic time now.
+
+        Returns:
+            bool: True if the window is hidden, or only ambient updates are left and there
+                hasn't been any input for IDLE_TIMEOUT seconds.
+        """
+        if not self.idle_throttling:
+            return False
+        if self.hidden:
+            return True
+        if any(not update[3] for update in self.updates.values()):
+            return False  # Something needs animating
+        return now - self.last_wake_time >= IDLE_TIMEOUT
+
+    def idle_report(self):
+        """Print how much time the clock slept and an estimate of the CPU time that saved."""
+        average_cost = self.frame_cost_total / self.frame_count if self.frame_count else 0.0
+        time_asleep = self.time_asleep
+        frames_saved = self.frames_saved
+        if self.sleep_start is not None:
+            # Count the sleep the clock is still in, as the window may close without waking it
+            asleep_now = monotonic() - self.sleep_start
+            time_asleep += asleep_now
+            frames_saved += asleep_now / (self.frame_delay / 1000)
+        print(f"Frames run: {self.frame_count}, averaging {average_cost * 1000:.2f} ms")
+        print(f"Asleep for {time_asleep:.1f} s, {frames_saved:.0f} frames not run")
+        print(f"Estimated CPU time saved: {frames_saved * average_cost * 1000:.0f} ms")
+
+    def tick(self):
+        """Run one frame of every update that is due, then schedule the next frame."""
+        frame_start = time.perf_counter()  # Time the frame to measure its cost
+        now = monotonic()
+        self.frame_count += 1
+        self.frame_lateness = max(now - self.next_frame_time, 0.0)  # Time the frame waited behind other work
+
+        # Advance the animation clock by the real time that passed, or by one fixed frame
+        if self.time_based:
+            self.clock += min(now - self.last_tick_time, MAX_FRAME_TIME)
+        else:
+            self.clock += self.frame_delay / 1000
+        self.last_tick_time = now
+
+        # Copy the updates so callbacks can register or unregister while the frame runs,
+        # in order of priority
+        updates = sorted(self.updates.items(), key=lambda item: item[1][4])
+        for name, update in updates:
+            callback, interval, last_run, ambient, priority = update
+            elapsed = self.clock - last_run  # Time since this update last ran
+            if elapsed < interval - 1e-9 or self.updates.get(name) is not update:
+                continue  # Not due yet, or removed by an earlier update this frame
+            update[2] = self.clock  # Remember when the update last ran
+            if callback(elapsed) is False:
+                self.unregister(name)  # The update has finished
+
+        self.frame_cost = time.perf_counter() - frame_start  # Record how long the frame took
+        self.frame_cost_total += self.frame_cost
+
+        now = monotonic()
+        if self.is_idle(now):
+            # Go to sleep until wake() is called, without scheduling another frame
+            self.sleep_start = now
+            self.after_id = None
+            return
+
+        # Run slower while the window is unfocused
+        frame_delay = self.frame_delay
+        if self.idle_throttling and not self.focused:
+            frame_delay = max(IDLE_FRAME_DELAY, self.frame_delay)
+            self.frames_saved += (frame_delay - self.frame_delay) / self.frame_delay
+
+        # Schedule the next frame on a fixed grid so late timers don't make the clock drift,
+        # skipping any frames whose time has already passed
+        self.next_frame_time += frame_delay / 1000
+        while self.next_frame_time <= now:
+            self.next_frame_time += frame_delay / 1000
+            self.frames_skipped += 1
+        delay = int((self.next_frame_time - now) * 1000)  # Milliseconds until the next frame
+        self.after_id = self.root.after(delay, self.tick)  # Schedule the next frame
+
+
+class AssetCache:
+    """Process-wide cache that decodes each image once and shares the PhotoImage."""
+
+    def __init__(self):
+        """Initialize an empty AssetCache."""
+        self.images = {}  # Decoded images by file path
+        self.decode_times = {}  # Time in seconds each image took to decode
+        self.pending = []  # Files still waiting to be decoded in the background
+
+    def get(self, file):
+        """
+        Get the shared image for a file, decoding it if it isn't cached yet.
+
+        Args:
+            file (str): The file path of the image.
+
+        Returns:
+            tk.PhotoImage: The shared image.
+        """
+        if file not in self.images:
+            decode_start = time.perf_counter()  # Time the decode for the report
+            self.images[file] = tk.PhotoImage(file=file)
+            self.decode_times[file] = time.perf_counter() - decode_start
+        return self.images[file]
+
+    def preload(self, files):
+        """
+        Decode a list of images straight away.
+
+        Args:
+            files (iterable): The file paths of the images.
+        """
+        for file in files:
+            self.get(file)
+
+    def preload_in_background(self, root, files, callback=None):
+        """
+        Decode a list of images one at a time whenever the window is idle.
+
+        Args:
+            root (tk.Tk): The window whose idle time is used for decoding.
+            files (iterable): The file paths of the images.
+            callback (callable): A function to call, with no arguments, once they are all decoded.
+        """
+        self.pending.extend(file for file in files if file not in self.images)
+        root.after_idle(self.load_next, root, callback)
+
+    def load_next(self, root, callback=None):
+        """
+        Decode the next pending image and schedule the one after it.
+
+        Args:
+            root (tk.Tk): The window whose idle time is used for decoding.
+            callback (callable): A function to call once every pending image is decoded.
+        """
+        if self.pending:
+            self.get(self.pending.pop(0))
+        if self.pending:
+            root.after_idle(self.load_next, root, callback)
+        elif callback:
+            callback()
+
+    def release(self, file):
+        """
+        Drop the shared image for a file.
+
+        Only release an image once nothing on screen is using it, as Tk blanks any
+        items still showing it.
+
+        Args:
+            file (str): The file path of the image.
+        """
+        self.images.pop(file, None)
+        self.decode_times.pop(file, None)
+
+    def report(self):
+        """
+        Report the decode time and memory used by each cached image.
+
+        Returns:
+            dict: The decode time in milliseconds and approximate size in bytes of each image.
+        """
+        return {
+            file: {
+                "decode_ms": self.decode_times[file] * 1000,
+                "bytes": image.width() * image.height() * 4,  # Tk stores 4 bytes per pixel
+            }
+            for file, image in self.images.items()
+        }
+
+
+# Shared image cache for the whole process
+assets = AssetCache()
+
+
+class StartupTimer:
+    """Records how long each stage of starting the game took."""
+
+    def __init__(self, start, budget_ms=STARTUP_BUDGET_MS):
+        """
+        Initialize a StartupTimer instance.
+
+        Args:
+            start (float): The perf_counter() time startup began.
+            budget_ms (int): The time in milliseconds the first frame should appear within.
+        """
+        self.start = start  # Time startup began
+        self.budget_ms = budget_ms  # Time allowed for the first frame
+        self.marks = {}  # Milliseconds from the start to the end of each stage, in order
+
+    def mark(self, stage):
+        """
+        Record that a stage of startup has finished.
+
+        Args:
+            stage (str): The name of the stage.
+        """
+        self.marks[stage] = (time.perf_counter() - self.start) * 1000
+
+    def within_budget(self):
+        """
+        Check if the first frame appeared within the budget.
+
+        Returns:
+            bool: True if the first frame was on time, False if it was late or hasn't appeared.
+        """
+        return self.marks.get("first frame", float("inf")) <= self.budget_ms
+
+    def report(self):
+        """Print the time each stage finished at and whether startup met its budget."""
+        for stage, milliseconds in self.marks.items():
+            print(f"{stage}: {milliseconds:.1f} ms")
+        verdict = "within" if self.within_budget() else "over"
+        print(f"First frame {verdict} the {self.budget_ms} ms budget")
+
+
+# Startup timer for this run, started when the import began
+startup_timer = StartupTimer(import_start)
+
+
+class ViewModel:
+    """Text the labels should show, sent to Tk once per frame and only where it has changed."""
+
+    def __init__(self, on_change=None, on_flush=None):
+        """
+        Initialize an empty ViewModel.
+
+        Args:
+            on_change (callable): A function called with no arguments whenever text is set,
+                such as to wake the frame clock, or None.
+            on_flush (callable): A function called with no arguments after each flush, or None.
+        """
+        self.on_change = on_change  # Called whenever text is set
+        self.on_flush = on_flush  # Called after the changed text has been sent
+        self.displayed = {}  # Text each label is showing, by label
+        self.changes = {}  # Text each label should show after the next flush, by label
+        self.updates_sent = 0  # Number of label updates sent to Tk
+        self.updates_skipped = 0  # Number of label updates that didn't need sending
+
+    def set_text(self, label, text):
+        """
+        Set the text a label should show. Tk isn't told until the next flush.
+
+        Args:
+            label (tk.Label): The label.
+            text (str): The text to show.
+        """
+        if label in self.changes:
+            self.updates_skipped += 1  # Replaced before it was ever shown
+        self.changes[label] = text
+        if self.on_change is not None:
+            self.on_change()
+
+    def flush(self, elapsed=None):
+        """
+        Send the changed text to Tk. Run once per frame on the frame clock.
+
+        Args:
+            elapsed (float): The time in seconds since the last flush.
+        """
+        for label, text in self.changes.items():
+            if self.displayed.get(label) == text:
+                self.updates_skipped += 1  # The label is already showing this text
+            else:
+                label.config(text=text)
+                self.displayed[label] = text
+                self.updates_sent += 1
+        self.changes.clear()
+        if self.on_flush is not None:
+            self.on_flush()
+
+
+class InputQueue:
+    """Answer key presses queued by the key handlers and answered once per frame."""
+
+    def __init__(self, root, answer_keys, answer):
+        """
+        Initialize an empty InputQueue.
+
+        Args:
+            root (tk.Tk): The window, used to find out when the answer has been drawn.
+            answer_keys (dict): The (player, answer index) each key answers with, by key name.
+            answer (callable): The function called with the player and answer index of each answer.
+        """
+        self.root = root  # Window whose idle callbacks run after it has redrawn
+        self.answer_keys = answer_keys  # Answers by key name
+        self.answer = answer  # Answers for a player
+        self.held = set()  # Keys that are down, so auto-repeated presses can be ignored
+        self.releases = {}  # Time of each key release not yet applied, by key name
+        self.pending = {}  # The (answer index, time pressed) of each player's queued answer, by player
+        self.waiting_for_paint = []  # Times the keys were pressed for answers whose labels were just sent
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)  # Recent times in seconds from key press to redraw
+        self.repeats_dropped = 0  # Number of auto-repeated presses ignored
+        self.duplicates_dropped = 0  # Number of presses ignored because the player had already answered that frame
+
+    def press(self, event):
+        """
+        Queue the answer for a key press, unless it is an auto-repeat or the player already answered this frame.
+
+        Args:
+            event (tk.Event): The key press event.
+        """
+        answer = self.answer_keys.get(event.keysym)
+        if answer is None:
+            return  # Not an answer key
+
+        key = event.keysym
+        if key in self.releases:
+            if self.releases.pop(key) == event.time:
+                self.repeats_dropped += 1  # Auto-repeat on X11 sends a release and press at the same time
+                return
+        elif key in self.held:
+            self.repeats_dropped += 1  # Auto-repeat on Windows sends presses without releases
+            return
+        self.held.add(key)
+
+        player, index = answer
+        if player in self.pending:
+            self.duplicates_dropped += 1  # Only the first answer of a frame counts
+            return
+        self.pending[player] = (index, monotonic())
+
+    def release(self, event):
+        """
+        Note a key release. It is applied at the next frame, in case it is part of an auto-repeat.
+
+        Args:
+            event (tk.Event): The key release event.
+        """
+        if event.keysym in self.held:
+            self.releases[event.keysym] = event.time
+
+    def clear_held(self):
+        """Forget which keys are down, such as when the window loses the focus and misses their releases."""
+        self.held.clear()
+        self.releases.clear()
+
+    def process(self, elapsed):
+        """
+        Answer the queued key presses. Runs on the frame clock before the labels are sent.
+
+        Args:
+            elapsed (float): The time in seconds since the last frame.
+        """
+        for key in self.releases:
+            self.held.discard(key)
+        self.releases.clear()
+
+        answers, self.pending = self.pending, {}
+        for player, (index, press_time) in answers.items():
+            self.answer(player, index)
+            self.waiting_for_paint.append(press_time)
+
+    def labels_sent(self):
+        """Measure the answers' latency once Tk has drawn the labels they changed."""
+        if self.waiting_for_paint:
+            # Idle callbacks run in order, so this runs after the redraw the label changes asked for
+            self.root.after_idle(self.painted, self.waiting_for_paint)
+            self.waiting_for_paint = []
+
+    def painted(self, press_times):
+        """
+        Record the time from each key press to the redraw that showed its answer.
+
+        Args:
+            press_times (list): The times the keys were pressed.
+        """
+        now = monotonic()
+        for press_time in press_times:
+            self.latencies.append(now - press_time)
+
+    def report(self):
+        """Print the key-to-label latencies and how many presses were ignored."""
+        latencies = sorted(self.latencies)
+        if latencies:
+            median = latencies[len(latencies) // 2] * 1000
+            p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000
+            print(f"Key to label latency over {len(latencies)} answers: median {median:.1f} ms, "
+                  f"95th percentile {p95:.1f} ms, worst {latencies[-1] * 1000:.1f} ms")
+        print(f"Ignored {self.repeats_dropped} auto-repeats and {self.duplicates_dropped} same-frame duplicates")
+
+
+class Tween:
+    """Moves one canvas item up or down towards a target, using a single update on the frame clock."""
+
+    def __init__(self, scheduler, canvas, item, name, y):
+        """
+        Initialize a Tween instance. It doesn't move the item until it is given a target.
+
+        Args:
+            scheduler (FrameScheduler): The frame clock that runs the tween.
+            canvas (tk.Canvas): The canvas the item is on.
+            item (int): The id of the canvas item to move.
+            name (str): The name of the tween's update, which is the same every time it runs.
+            y (float): The item's current y-coordinate.
+        """
+        self.scheduler = scheduler  # Frame clock that runs the tween
+        self.canvas = canvas  # Canvas the item is on
+        self.item = item  # Canvas item being moved
+        self.name = name  # Name of the tween's update on the frame clock
+        self.y = y  # The item's y-coordinate, kept here so it never has to be read from the canvas
+        self.target = y  # The y-coordinate the item is moving to
+        self.speed = 0  # Speed in pixels per second the item moves at
+
+    def move_to(self, target, speed):
+        """
+        Move the item to a new target. A tween that is already running is retargeted instead of
+        starting another one.
+
+        Args:
+            target (float): The y-coordinate to move to.
+            speed (float): The speed to move at, in pixels per second.
+        """
+        self.target = target
+        self.speed = speed
+        if self.y != target and not self.scheduler.is_registered(self.name):
+            self.scheduler.register(self.step, name=self.name)
+
+    def step(self, elapsed):
+        """
+        Move the item towards its target by the distance covered since the last frame.
+
+        Args:
+            elapsed (float): The time in seconds since the last frame.
+
+        Returns:
+            bool: True while the item hasn't reached its target.
+        """
+        move = min(abs(self.target - self.y), self.speed * elapsed)  # Don't move past the target
+        if self.target < self.y:
+            move = -move  # Move up
+        self.canvas.move(self.item, 0, move)
+        self.y += move
+        return self.y != self.target  # Stop once the target has been reached
+
+    def stop(self):
+        """Stop the item where it is."""
+        self.target = self.y
+        self.scheduler.unregister(self.name)
+
+
+class QualityGovernor:
+    """Lowers the quality level when frames go over budget and raises it again when there is headroom."""
+
+    def __init__(self, scheduler, apply, budget_ms=FRAME_BUDGET_MS, levels=QUALITY_LEVELS):
+        """
+        Initialize a QualityGovernor instance at full quality.
+
+        Args:
+            scheduler (FrameScheduler): The frame clock whose frames are measured.
+            apply (callable): A function called with the new level whenever it changes.
+            budget_ms (float): The time in milliseconds a frame may take.
+            levels (int): The number of quality levels.
+        """
+        self.scheduler = scheduler  # Frame clock whose frames are measured
+        self.apply = apply  # Called with the new level when it changes
+        self.budget = budget_ms / 1000  # Time in seconds a frame may take
+        self.levels = levels  # Number of quality levels
+        self.level = 0  # Current quality level, 0 being the best
+        self.average_frame_time = 0.0  # Smoothed time in seconds frames are taking
+        self.time_at_level = 0.0  # Time in seconds since the level last changed
+        self.changes = 0  # Number of times the level has changed
+
+    def update(self, elapsed):
+        """
+        Measure the last frame and change the quality level if needed. Runs on the frame clock.
+
+        A frame's time is how long its updates took plus how late it started, which includes
+        the time Tk spent drawing. The level only changes after it has been held for a while,
+        and is raised only when frames are well under budget, so it doesn't flicker.
+
+        Args:
+            elapsed (float): The time in seconds since the last update.
+        """
+        frame_time = self.scheduler.frame_cost + self.scheduler.frame_lateness
+        self.average_frame_time += QUALITY_SMOOTHING * (frame_time - self.average_frame_time)
+        self.time_at_level += elapsed
+
+        if self.average_frame_time > self.budget and self.time_at_level >= QUALITY_HOLD_TIME:
+            self.set_level(self.level + 1)  # Over budget, cut back
+        elif (self.average_frame_time < self.budget * QUALITY_RESTORE_FRACTION
+              and self.time_at_level >= QUALITY_RESTORE_TIME):
+            self.set_level(self.level - 1)  # Plenty of headroom, bring quality back
+
+    def set_level(self, level):
+        """
+        Change the quality level, if it is in range.
+
+        Args:
+            level (int): The new level.
+        """
+        if 0 <= level < self.levels and level != self.level:
+            self.level = level
+            self.time_at_level = 0.0
+            self.changes += 1
+            self.apply(level)
+
+
+class ScreenManager:
+    """Builds each screen once and switches between screens by placing and forgetting their widgets."""
+
+    def __init__(self):
+        """Initialize a ScreenManager with no screens."""
+        self.builders = {}  # Functions that build each screen, by name
+        self.screens = {}  # Built screens by name, as lists of (widget, place options)
+        self.current = None  # Name of the screen on display
+
+    def add(self, name, builder):
+        """
+        Add a screen. It isn't built until it is first shown.
+
+        Args:
+            name (str): The name of the screen.
+            builder (callable): A function that creates the screen's widgets and returns a
+                list of (widget, place options) pairs for the widgets to place on the screen.
+        """
+        self.builders[name] = builder
+
+    def show(self, name):
+        """
+        Hide the current screen and show another, building it the first time it is shown.
+
+        Args:
+            name (str): The name of the screen to show.
+        """
+        if self.current is not None:
+            for widget, place_options in self.screens[self.current]:
+                widget.place_forget()  # Hide the widgets of the current screen
+
+        if name not in self.screens:
+            self.screens[name] = self.builders[name]()  # Build the screen the first time
+        for widget, place_options in self.screens[name]:
+            widget.place(**place_options)
+        self.current = name
 
 
 class Player:
@@ -43,20 +814,31 @@ class Player:
             name (str): The name of the player.
         """
         self.game = game  # Reference to the game instance
-        self.car_image = tk.PhotoImage(file=car_image_file)  # Load the car image
-        self.car_side_image = tk.PhotoImage(file=car_side_image_file)  # Load the car side image
-        self.player_car = self.game.right_canvas.create_image(car_start_x, car_start_y, image=self.car_image, tag="car")  # Create car image on canvas
-        self.score = 0  # Initialize player's score
+        self.car_image = assets.get(car_image_file)  # Get the shared car image
+        self.car_side_image = assets.get(car_side_image_file)  # Get the shared car side image
+        self.car_start_x, self.car_start_y = car_start_x, car_start_y  # Where the car starts each round
+        self.player_car = None  # Car image on canvas, created each round
+        self.car_tween = None  # Moves the car to where the player's score puts it, created each round
+        self.state = None  # Player's score and question in the current match
+        self.player_frame = None  # Placeholder for the player's frame
         self.score_label = None  # Placeholder for the score label
         self.question_label = None  # Placeholder for the question label
         self.answer_labels = []  # List to hold answer labels
-        self.correct_answer = None  # Placeholder for the correct answer
-        self.keys = keys  # Keys assigned to the player
+        self.keys = keys  # Keys assigned to the player, looked up by the game's key handler
         self.name = name  # Player's name
 
-        # Bind keys to answer checking method
-        for index, key in enumerate(keys):
-            self.game.bind(f"<{keys[index]}>", lambda event, idx=index: self.check_answer(idx))
+    def new_round(self):
+        """Join the game's current match and put a new car at the starting point."""
+        self.state = self.game.match.add_player(self.name)  # Player's score and question in the match
+        self.player_car = self.game.right_canvas.create_image(self.car_start_x, self.car_start_y, image=self.car_image, tag="car")  # Create car image on canvas
+        self.car_tween = Tween(self.game.scheduler, self.game.right_canvas, self.player_car, f"{self.name} car", self.car_start_y)
+        self.car_tween.move_to(CAR_BASE_Y, CAR_DRIVE_SPEED)  # Drive onto the road
+        self.game.view.set_text(self.score_label, f"Score: {self.score}")  # Reset the score label
+
+    @property
+    def score(self):
+        """int: The player's score in the match."""
+        return self.state.score
 
     def game_won(self):
         """
@@ -65,38 +847,41 @@ class Player:
         Returns:
             bool: True if a winner has been declared, False otherwise.
         """
-        if self.game.winner:  # If a winner has been declared
+        if self.game.match.winner:  # If a winner has been declared
             return True  # Return True if the game is won
         else:
             return False  # Return False if the game is still ongoing
 
-    def create_player_frame(self, frame_x, frame_y):
+    def create_player_frame(self, frame_x, frame_y, frame_width=500, frame_height=300):
         """
         Create a frame for the player with questions and answers.
 
         Args:
             frame_x (int): The x-coordinate for the frame's position.
             frame_y (int): The y-coordinate for the frame's position.
+            frame_width (int): The width of the frame.
+            frame_height (int): The height of the frame.
         """
         self.frame_x, self.frame_y = frame_x, frame_y  # Store frame coordinates
+        self.frame_width, self.frame_height = frame_width, frame_height  # Store frame size
+        font = NORMAL_TEXT_FONT if frame_width >= 500 else SMALL_TEXT_FONT  # Smaller text in smaller frames
 
-        # Create the player's frame on the left canvas
+        # Create the player's frame on the left canvas, hidden until the countdown ends
         self.player_frame = tk.Canvas(self.game.left_canvas, relief="solid", borderwidth=5)
-        self.player_frame.place(x=frame_x, y=frame_y, anchor=tk.CENTER, width=500, height=300)
 
         # Create the question label inside the player's frame
-        self.question_label = tk.Label(self.player_frame, text="", font=NORMAL_TEXT_FONT)
+        self.question_label = tk.Label(self.player_frame, text="", font=font)
         self.question_label.place(relx=0.5, rely=0.20, anchor=tk.CENTER)
 
         # Side car image for Player
-        self.player_frame.create_image(150, 150, anchor=tk.NW, image=self.car_side_image)
+        self.player_frame.create_image(frame_width * 0.3, frame_height * 0.5, anchor=tk.NW, image=self.car_side_image)
 
         # Answer labels for Player
         self.answer_labels = [
-            tk.Label(self.player_frame, text="", font=NORMAL_TEXT_FONT),
-            tk.Label(self.player_frame, text="", font=NORMAL_TEXT_FONT),
-            tk.Label(self.player_frame, text="", font=NORMAL_TEXT_FONT),
-            tk.Label(self.player_frame, text="", font=NORMAL_TEXT_FONT)
+            tk.Label(self.player_frame, text="", font=font),
+            tk.Label(self.player_frame, text="", font=font),
+            tk.Label(self.player_frame, text="", font=font),
+            tk.Label(self.player_frame, text="", font=font)
         ]
 
         # Place answer labels
@@ -104,64 +889,22 @@ class Player:
             label.place(relx=0.20 * (i + 1), rely=0.35, anchor=tk.CENTER)
 
         # Player score label
-        self.score_label = tk.Label(self.player_frame, text=f"Score: {self.score}", font=NORMAL_TEXT_FONT)
+        self.score_label = tk.Label(self.player_frame, text="Score: 0", font=font)
         self.score_label.place(relx=0.5, rely=0.1, anchor=tk.CENTER)
 
-    def generate_question(self, difficulty):
-        """
-        Generate a new math question and display it for the player.
-
-        Args:
-            difficulty (str): The difficulty level of the question ('easy', 'medium', 'hard').
-        """
+    def generate_question(self):
+        """Generate a new math question and display it for the player."""
         if self.game_won():  # If the game is won, don't generate more questions
             return
 
-        self.difficulty = difficulty  # Set the difficulty level for the player
-
-        # Generate two random numbers for the question
-        num1 = random.randint(1, 10)
-        num2 = random.randint(1, 10)
-
-        # Generate question based on difficulty
-        if difficulty == "easy":
-            self.correct_answer = num1 + num2  # Set correct answer for addition
-            current_question = f"What is {num1} + {num2}?"  # Formulate question
-
-        elif difficulty == "medium":
-            chosen_operation = random.choice(("+", "-"))  # Randomly choose between addition and subtraction
-            if chosen_operation == "+":
-                self.correct_answer = num1 + num2  # Set correct answer for addition
-            elif chosen_operation == "-":
-                self.correct_answer = num1 - num2  # Set correct answer for subtraction
-            current_question = f"What is {num1} {chosen_operation} {num2}?"  # Formulate question
-
-        elif difficulty == "hard":
-            chosen_operation = random.choice(("+", "-", "*", "/"))  # Randomly choose between four operations
-            if chosen_operation == "+":
-                self.correct_answer = num1 + num2  # Set correct answer for addition
-            elif chosen_operation == "-":
-                self.correct_answer = num1 - num2  # Set correct answer for subtraction
-            elif chosen_operation == "*":
-                self.correct_answer = num1 * num2  # Set correct answer for multiplication
-            elif chosen_operation == "/":
-                self.correct_answer = num1 / num2  # Set correct answer for division
-            current_question = f"What is {num1} {chosen_operation} {num2}?"  # Formulate question
-
-        # Generate answer options
-        answers = [self.correct_answer]  # Start with the correct answer in the list
-        while len(answers) < 4:  # Add incorrect answers until there are four total options
-            wrong_answer = random.randint(-20, 20)  # Generate a random wrong answer
-            if wrong_answer not in answers:
-                answers.append(wrong_answer)  # Ensure no duplicate answers
-
-        random.shuffle(answers)  # Shuffle the answers to randomize their order
-
-        # Update the question and answers on the GUI
-        self.question_label.config(text=current_question)  # Display the question
+        self.game.match.generate_question(self.state)  # Let the match pick the question
+        self.show_question()
+
+    def show_question(self):
+        """Display the player's current question and answer options."""
+        self.game.view.set_text(self.question_label, self.state.question)  # Display the question
         for i, label in enumerate(self.answer_labels):
-            label.config(text=f"{self.keys[i]}: {answers[i]}")  # Display the answer options
-            label.answer_value = answers[i]  # Store the value for checking later
+            self.game.view.set_text(label, f"{self.keys[i]}: {self.state.answers[i]}")  # Display the answer options
 
     def check_answer(self, index):
         """
@@ -170,53 +913,31 @@ class Player:
         Args:
             index (int): The index of the selected answer.
         """
-        if self.game_won():  # If the game is won, don't check answers
+        if self.game_won() or not self.state.answers:  # If the game is won or hasn't started, don't check answers
             return
 
-        if self.answer_labels[index].answer_value == self.correct_answer:  # Check if selected answer is correct
-            self.score += 1  # Increase score on correct answer
-            if self.score == FINAL_SCORE:  # Check if player reached final score
-                self.game.winner = self.name  # Declare this player as the winner
-                self.animate_car_up(CAR_UP_TOTAL_MOVE // CAR_MOVE_STEP)  # Move the car up with animation
-                self.game.end_game()  # End the game
-            else:
-                self.animate_car_up(CAR_UP_TOTAL_MOVE // CAR_MOVE_STEP)  # Move the car up with animation
-        elif self.score > 0:
-            self.animate_car_down(CAR_DOWN_TOTAL_MOVE // CAR_MOVE_STEP)  # Move the car down slowly
-            self.score -= 1  # Decrease score on incorrect answer
-
-        # Check if the score_label exists before updating
-        if self.score_label.winfo_exists():
-            self.score_label.config(text=f"Score: {self.score}")  # Update score label
-        self.generate_question(self.difficulty)  # Generate a new question
+        change = self.game.match.check_answer(self.state, index)  # Score the answer
+        if change > 0:
+            self.car_tween.move_to(self.car_target_y(), CAR_UP_SPEED)  # Move the car up with animation
+        elif change < 0:
+            self.car_tween.move_to(self.car_target_y(), CAR_DOWN_SPEED)  # Move the car down slowly
 
-    def animate_car_up(self, steps):
-        """
-        Animate the car moving up in steps.
+        if self.game_won():  # Check if player reached final score
+            self.game.winner = self.game.match.winner  # Declare the winner
+            self.game.end_game()  # End the game
+            return
 
-        Args:
-            steps (int): The number of steps to move the car up.
-        """
-        if steps > 0:
-            # Move the car up by CAR_MOVE_STEP units
-            self.game.right_canvas.move(self.player_car, 0, -CAR_MOVE_STEP)
-            # Schedule the next step of the animation after ANIMATION_DELAY milliseconds
-            self.game.after(ANIMATION_DELAY, self.animate_car_up, steps - 1)
+        self.game.view.set_text(self.score_label, f"Score: {self.score}")  # Update score label
+        self.show_question()  # Show the new question
 
-    def animate_car_down(self, steps):
+    def car_target_y(self):
         """
-        Animate the car moving down slowly until it reaches the starting point.
+        Get where the player's score puts their car.
 
-        Args:
-            steps (int): The number of steps to move the car down.
+        Returns:
+            int: The y-coordinate of the car, CAR_UP_TOTAL_MOVE pixels above the start for each point.
         """
-        # Get the current coordinates of the car
-        car_coords = self.game.right_canvas.coords(self.player_car)
-        if car_coords[1] < 700 and steps > 0:
-            # Move the car down by CAR_MOVE_STEP units
-            self.game.right_canvas.move(self.player_car, 0, CAR_MOVE_STEP)
-            # Schedule the next step of the animation after 200 milliseconds
-            self.game.after(200, self.animate_car_down, steps - 1)
+        return CAR_BASE_Y - self.score * CAR_UP_TOTAL_MOVE
 
     def hide_frame(self):
         """
@@ -240,17 +961,47 @@ class Player:
                 x=self.frame_x, 
                 y=self.frame_y, 
                 anchor=tk.CENTER, 
-                width=500, 
-                height=300
+                width=self.frame_width, 
+                height=self.frame_height
             )
 
 class Game(tk.Tk):
     """Main game application class."""
 
-    def __init__(self):
-        """Initialize the main game window and setup UI components."""
+    def __init__(self, npc_pool_size=NPC_POOL_SIZE, deferred_startup=DEFERRED_STARTUP, startup_report=False,
+                 road_rendering=ROAD_RENDERING, idle_report=False, quality_governor=QUALITY_GOVERNOR,
+                 player_count=PLAYER_COUNT, input_report=False, seed=None, save_replays=SAVE_REPLAYS, network=None):
+        """
+        Initialize the main game window and setup UI components.
+
+        Args:
+            npc_pool_size (int): The most NPC cars kept driving on the road at once.
+            road_rendering (str): How the road lines and finish line are drawn ('dash' or 'items').
+            idle_report (bool): True to print how much CPU time idle throttling saved when the game closes.
+            quality_governor (bool): True to cut back on eye candy when frames take too long.
+            player_count (int): The number of players, from MIN_PLAYERS to MAX_PLAYERS.
+            input_report (bool): True to print the key-to-label latencies when the game closes.
+            seed (int): The seed every match uses, so they all deal the same questions, or None
+                for a new seed each match.
+            save_replays (bool): True to save a replay log of every match.
+            network (LoopbackClient or NetClient): The connection to a networked match's host, or
+                None to play on one keyboard.
+            deferred_startup (bool): True to show the login screen before loading the rest of the scene.
+            startup_report (bool): True to print how long each stage of startup took.
+        """
+        if not MIN_PLAYERS <= player_count <= MAX_PLAYERS:
+            raise ValueError(f"A game needs {MIN_PLAYERS} to {MAX_PLAYERS} players, not {player_count}")
+        if seed is not None and not 0 <= seed < SEED_LIMIT:
+            raise ValueError(f"A seed must be from 0 to {SEED_LIMIT - 1}, not {seed}")
         super().__init__()
         self.title("Trivia Turbo")
+        self.player_count = player_count  # Number of players
+        self.seed = seed  # Seed every match uses, if set
+        self.save_replays = save_replays  # Whether to save a replay log of every match
+        self.replay_log = None  # Log of the current match's questions and answers
+        self.network = network  # Connection to the host of a networked match
+        self.players = []  # Players in the order they joined, created with the game screen
+        self.answer_keys = {}  # The (player, answer index) each key answers with, by key name
 
         # Center the game window on the screen
         screen_width, screen_height = self.winfo_screenwidth(), self.winfo_screenheight()
@@ -262,8 +1013,6 @@ class Game(tk.Tk):
         # Create the left canvas
         self.left_canvas = tk.Canvas(self, width=600, height=800)
         self.left_canvas.place(x=0, y=0)
-        self.bg_image_photo = tk.PhotoImage(file="cars/background.png")  # Load background image
-        self.bg_image = self.left_canvas.create_image(0, 0, anchor=tk.NW, image=self.bg_image_photo)
 
         # Create the right canvas
         self.right_canvas = tk.Canvas(self, width=400, height=800)
@@ -281,35 +1030,161 @@ class Game(tk.Tk):
             pady=5
         )
         self.title_label.place(x=300, y=50, anchor=tk.CENTER)
-        
+
+        # Label for error and success messages, shown when there is a message
+        self.status_label = tk.Label(self.left_canvas, text="", font=SMALL_TEXT_FONT, bg="white")
+
+        # Screens are built the first time they are shown and reused after that
+        self.screens = ScreenManager()
+        self.screens.add("login", self.build_login_screen)
+        self.screens.add("difficulty", self.build_difficulty_screen)
+        self.screens.add("game", self.build_game_screen)
+        self.screens.add("end", self.build_end_screen)
+
         # Initialize login screen
         self.show_login_screen()
-        
-        # Initialize variables to hold references to the labels
-        self.error_label = None
-        self.success_label = None
-        
+
+        # Create the frame clock that drives every animation
+        self.scheduler = FrameScheduler(self)
+        self.idle_report = idle_report  # Whether to print the idle throttling report on close
+
+        # Wake the frame clock on any input, and let it rest while the window is hidden or unfocused
+        self.bind("<Map>", lambda event: self.window_mapped(event, True))
+        self.bind("<Unmap>", lambda event: self.window_mapped(event, False))
+        self.bind("<FocusIn>", lambda event: self.window_focused(event, True))
+        self.bind("<FocusOut>", lambda event: self.window_focused(event, False))
+        self.bind_all("<Key>", lambda event: self.scheduler.wake(), add="+")
+        self.bind_all("<Button>", lambda event: self.scheduler.wake(), add="+")
+
+        # Answer keys are queued by one handler for every player and answered once per frame
+        self.input_report = input_report  # Whether to print the input latencies on close
+        self.input_queue = InputQueue(self, self.answer_keys, self.answer)
+        self.bind("<Key>", self.input_queue.press)
+        self.bind("<KeyRelease>", self.input_queue.release)
+        self.scheduler.register(self.input_queue.process, name="input", ambient=True, priority=PRIORITY_INPUT)
+
+        # Label text is sent to Tk once per frame, only where it has changed
+        self.view = ViewModel(on_change=self.scheduler.wake, on_flush=self.input_queue.labels_sent)
+        self.scheduler.register(self.view.flush, name="view", ambient=True, priority=PRIORITY_VIEW)
+
+        # Pool of canvas items used as NPC cars, with their y-coordinates kept alongside
+        self.full_npc_pool_size = npc_pool_size  # Pool size at full quality
+        self.npc_pool_size = npc_pool_size
+        self.npc_cars = []
+        self.npc_y = array("d")
+
+        # Positions of the road lines and finish line, so frames never read them from the canvas
+        self.road_rendering = road_rendering  # How the road lines and finish line are drawn
+        self.finish_line_image = None  # Finish line drawn once into an image, for the 'dash' rendering
+        self.line_offset = 0.0  # How far the road lines have scrolled past their starting points
+        self.finish_line_y = FINISH_LINE_Y  # The y-coordinate of the top of the finish line
+
+        # Quality level, lowered by the governor when frames take too long
+        self.quality_level = 0
+        self.road_interval = 0  # Milliseconds between road updates
+        self.racing = False  # True from the start of a race until it is won
+        self.governor = QualityGovernor(self.scheduler, self.apply_quality)
+        if quality_governor:
+            self.scheduler.register(self.governor.update, name="quality", ambient=True)
+
+        self.startup_report = startup_report  # Whether to print the startup times
+        startup_timer.mark("window created")
+
+        if not deferred_startup:
+            self.load_scene()
+        # Idle callbacks can run before the window is even mapped, so wait for it to be exposed.
+        # With deferred startup, the rest of the scene loads once the login screen is up.
+        self.bind("<Expose>", lambda event: self.first_frame(event, deferred_startup), add="+")
+
+    def first_frame(self, event, load_scene):
+        """
+        Record that the first frame has been drawn, the first time the window is exposed.
+
+        Args:
+            event (tk.Event): The Expose event.
+            load_scene (bool): True to load the rest of the scene now the first frame is up.
+        """
+        if event.widget is not self:
+            return  # Widgets inside the window are exposed too
+        self.unbind("<Expose>")
+        self.update_idletasks()  # Draw the exposed window before timing it
+        startup_timer.mark("first frame")
+        if load_scene:
+            self.after_idle(self.load_scene)
+
+    def load_scene(self):
+        """Load the background, the road and the NPC animation, and start the frame clock."""
+        self.bg_image_photo = assets.get("cars/background.png")  # Load background image
+        self.bg_image = self.left_canvas.create_image(0, 0, anchor=tk.NW, image=self.bg_image_photo)
+
         # Load cars and create scrolling background
         self.load_carscroll()
         self.create_moving_lines()
 
         # Start NPC movement
-        self.npc_movement()
+        self.scheduler.register(self.npc_movement, name="npc_movement", ambient=True)
+        self.scheduler.start()
+        startup_timer.mark("scene loaded")
+
+        # Decode the car images while the login screen is idle so starting a game doesn't have to
+        assets.preload_in_background(self, ASSET_FILES, self.assets_loaded)
+
+    def assets_loaded(self):
+        """Record that every image has been decoded and print the startup report if asked for."""
+        startup_timer.mark("assets loaded")
+        if self.startup_report:
+            startup_timer.report()
+            for file, stats in assets.report().items():
+                print(f"{file}: decoded in {stats['decode_ms']:.1f} ms, {stats['bytes'] / 1024:.0f} KiB")
+
+    def window_focused(self, event, focused):
+        """
+        Tell the frame clock when the window gains or loses the keyboard focus.
+
+        Args:
+            event (tk.Event): The FocusIn or FocusOut event.
+            focused (bool): True if the window gained the focus, False if it lost it.
+        """
+        self.scheduler.set_focused(focused)
+        if not focused:
+            self.input_queue.clear_held()  # Key releases won't arrive while the window is unfocused
+
+    def window_mapped(self, event, mapped):
+        """
+        Tell the frame clock when the window is shown or hidden, such as by minimizing it.
+
+        Args:
+            event (tk.Event): The Map or Unmap event.
+            mapped (bool): True if the window was shown, False if it was hidden.
+        """
+        if event.widget is self:  # Widgets inside the window are mapped and unmapped too
+            self.scheduler.set_hidden(not mapped)
+
+    def show_screen(self, name):
+        """
+        Switch to another screen, hiding any message on the current one.
 
-        # Start the main event loop
-        self.mainloop()
+        Args:
+            name (str): The name of the screen to show.
+        """
+        self.remove_existing_labels()
+        self.screens.show(name)
 
     def show_login_screen(self):
         """Display the login screen."""
         self.geometry("1000x800")
         self.resizable(False, False)
+        self.show_screen("login")
 
-        # Clear previous widgets from left canvas
-        self.clear_canvas_widgets()
+    def build_login_screen(self):
+        """
+        Build the login screen.
 
+        Returns:
+            list: The (widget, place options) pairs of the screen.
+        """
         # Create a login frame on the left canvas
         login_frame = tk.Frame(self.left_canvas, bg="white", padx=100)
-        login_frame.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
 
         # Username label and entry
         username_label = tk.Label(login_frame, text="Username:", font=NORMAL_TEXT_FONT, bg="white")
@@ -331,14 +1206,22 @@ class Game(tk.Tk):
         signup_button = tk.Button(login_frame, text="Sign Up", font=NORMAL_TEXT_FONT, command=self.create_login)
         signup_button.pack(pady=10)
 
+        return [(login_frame, {"relx": 0.5, "rely": 0.5, "anchor": tk.CENTER})]
+
     def remove_existing_labels(self):
-        """Remove existing error or success labels if they exist."""
-        if self.error_label:
-            self.error_label.destroy()  # Remove error label from canvas
-            self.error_label = None
-        if self.success_label:
-            self.success_label.destroy()  # Remove success label from canvas
-            self.success_label = None
+        """Hide the error or success message if one is showing."""
+        self.status_label.place_forget()
+
+    def show_status(self, text, colour):
+        """
+        Show an error or success message.
+
+        Args:
+            text (str): The message to show.
+            colour (str): The colour of the message text.
+        """
+        self.status_label.config(text=text, fg=colour)
+        self.status_label.place(relx=0.5, rely=0.8, anchor=tk.CENTER)
 
     def check_login(self):
         """Check the user's login credentials."""
@@ -349,18 +1232,11 @@ class Game(tk.Tk):
         self.remove_existing_labels()
 
         # Check if the credentials are correct
-        if username in accounts and accounts[username] == password:
+        if accounts.check(username, password):
             self.show_difficulty_selection()  # Show the difficulty selection screen
         else:
             # Display error message for invalid credentials
-            self.error_label = tk.Label(
-                self.left_canvas,
-                text="Invalid username or password, please try again.",
-                font=SMALL_TEXT_FONT,
-                fg="red",
-                bg="white"
-            )
-            self.error_label.place(relx=0.5, rely=0.8, anchor=tk.CENTER)
+            self.show_status("Invalid username or password, please try again.", "red")
 
     def create_login(self):
         """Create a new account."""
@@ -370,71 +1246,45 @@ class Game(tk.Tk):
         # Remove any existing labels before showing a new one
         self.remove_existing_labels()
 
-        # Validate username and password
+        # Validate username and password, the last failed check giving the message
+        error_message = None
         if username in accounts:
             # Display error if username already exists
-            self.error_label = tk.Label(
-                self.left_canvas,
-                text="Username already exists, please choose another.",
-                font=SMALL_TEXT_FONT,
-                fg="red",
-                bg="white"
-            )
+            error_message = "Username already exists, please choose another."
 
         if not username.isalpha():
             # Display error if username contains non-letter characters
-            self.error_label = tk.Label(
-                self.left_canvas,
-                text="Username may only contain letters",
-                font=SMALL_TEXT_FONT,
-                fg="red",
-                bg="white"
-            )
+            error_message = "Username may only contain letters"
 
         if len(username) < 3:
             # Display error if username is too short
-            self.error_label = tk.Label(
-                self.left_canvas,
-                text="Username must be at least 3 characters.",
-                font=SMALL_TEXT_FONT,
-                fg="red",
-                bg="white"
-            )
+            error_message = "Username must be at least 3 characters."
 
         if not password or not username:
             # Display error if username or password is missing
-            self.error_label = tk.Label(
-                self.left_canvas,
-                text="Please enter a username and password",
-                font=SMALL_TEXT_FONT,
-                fg="red",
-                bg="white"
-            )
+            error_message = "Please enter a username and password"
 
-        if self.error_label:
-            self.error_label.place(relx=0.5, rely=0.8, anchor=tk.CENTER)  # Show error label
+        if error_message:
+            self.show_status(error_message, "red")  # Show error label
         else:
             # Save new account information and display success message
-            accounts[username] = password
-            with open(account_data_file, "w") as file:
-                json.dump(accounts, file)
-            self.success_label = tk.Label(
-                self.left_canvas,
-                text="Account created successfully!",
-                font=SMALL_TEXT_FONT,
-                fg="green",
-                bg="white"
-            )
-            self.success_label.place(relx=0.5, rely=0.8, anchor=tk.CENTER)
+            accounts.add(username, password)
+            self.show_status("Account created successfully!", "green")
 
     def show_difficulty_selection(self):
         """ Show the difficulty selection menu."""
         self.game_running = True  # Set game_running flag to True
-        self.clear_canvas_widgets()  # Clear all widgets from the canvas
+        self.show_screen("difficulty")
+
+    def build_difficulty_screen(self):
+        """
+        Build the difficulty selection screen.
 
+        Returns:
+            list: The (widget, place options) pairs of the screen.
+        """
         # Create a frame for difficulty selection on the left canvas
         difficulty_frame = tk.Frame(self.left_canvas, bg="white", padx=50)
-        difficulty_frame.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
 
         # Create and place a label for difficulty selection
         difficulty_label = tk.Label(difficulty_frame, text="Select Difficulty", font=TITLE_TEXT_FONT, bg="white")
@@ -450,6 +1300,8 @@ class Game(tk.Tk):
         hard_button = tk.Button(difficulty_frame, text="Hard", font=NORMAL_TEXT_FONT, command=lambda: self.start_game("hard"))
         hard_button.pack(pady=10)
 
+        return [(difficulty_frame, {"relx": 0.5, "rely": 0.5, "anchor": tk.CENTER})]
+
     def countdown(self, seconds):
         """
         Countdown from a given number of seconds.
@@ -457,23 +1309,39 @@ class Game(tk.Tk):
         Args:
         seconds (int): The number of seconds to count down from.
         """
-        if seconds > 0:
-            # Update the countdown label with the current number of seconds
-            self.countdown_label.config(text=str(seconds))
-            
-            # Schedule the next countdown tick to occur after 1 second
-            self.after(1000, self.countdown, seconds - 1)
-        else:
-            # When the countdown reaches zero, destroy the countdown frame
-            self.countdown_frame.destroy()
+        self.countdown_seconds = seconds  # Seconds left on the countdown
+        self.view.set_text(self.countdown_label, str(seconds))  # Show the starting number
+
+        # Tick the countdown once every second on the frame clock, before the view is refreshed
+        # so the first question shows in the same frame the countdown ends
+        self.scheduler.register(self.countdown_tick, interval=1000, name="countdown", priority=PRIORITY_INPUT)
 
-            # Show the frames for player1 and player2
-            self.player1.show_frame()
-            self.player2.show_frame()
+    def countdown_tick(self, elapsed):
+        """
+        Count down one second.
 
-            # Generate a question for each player based on the difficulty level
-            self.player1.generate_question(self.difficulty)
-            self.player2.generate_question(self.difficulty)
+        Args:
+            elapsed (float): The time in seconds since the last tick.
+
+        Returns:
+            bool: False once the countdown has finished.
+        """
+        self.countdown_seconds -= 1
+        if self.countdown_seconds > 0:
+            # Update the countdown label with the current number of seconds
+            self.view.set_text(self.countdown_label, str(self.countdown_seconds))
+        else:
+            # When the countdown reaches zero, hide the countdown frame
+            self.countdown_frame.place_forget()
+
+            # Show each player's frame and generate their first question
+            for player in self.players:
+                player.show_frame()
+                if self.network is None:
+                    player.generate_question()
+                elif player.state.answers:
+                    player.show_question()  # The host's question arrived during the countdown
+            return False  # Stop ticking the countdown
 
     def start_game(self, difficulty):
         """
@@ -484,47 +1352,143 @@ class Game(tk.Tk):
         """
         self.difficulty = difficulty  # Store selected difficulty
 
-        self.clear_canvas_widgets()  # Remove all widgets from the left canvas
-
         # Initialize game elements
         self.winner = None
+        if self.network is None:
+            self.replay_log = ReplayLog(clock=monotonic)  # Log every question and answer, so the match can be replayed
+        else:
+            self.replay_log = None  # The host deals the questions, so there is nothing to replay here
+        self.match = Match(difficulty, seed=self.seed, log=self.replay_log)  # Headless match that scores the players
 
-        # Create player1 and player2 with their respective attributes
-        self.player1 = Player(self, "cars/car1.png", "cars/carside1.png", 175, 1000, ("q", "w", "e", "r"), "Player 1")
-        self.player1.create_player_frame(300, 250)
-
-        self.player2 = Player(self, "cars/car2.png", "cars/carside2.png", 225, 1000, ("u", "i", "o", "p"), "Player 2")
-        self.player2.create_player_frame(300, 600)
-
-        self.start_animation()  # Start the animation of the cars
+        self.show_screen("game")  # Show the countdown, building the players the first time
 
-        # Hide player frames initially
-        self.player1.hide_frame()
-        self.player2.hide_frame()
+        # Put every player into the new match with a new car, hiding their frames until the countdown ends
+        for player in self.players:
+            player.new_round()
+            player.hide_frame()
 
-        # Create and place the countdown frame and label
-        self.countdown_frame = tk.Canvas(self.left_canvas, relief="solid", borderwidth=5)
-        self.countdown_frame.place(x=300, y=400, anchor=tk.CENTER, width=500, height=700)
+        self.racing = True
+        self.start_road()  # The road is part of the race, so it keeps the frame clock awake
 
-        self.countdown_label = tk.Label(self.countdown_frame, text="3", font=("Terminal", 200), foreground="Red")
-        self.countdown_label.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
+        if self.network is not None:
+            # The host deals the questions and scores the answers, and sends what changed
+            self.network.join(difficulty, self.player_count)
+            self.scheduler.register(self.network_update, name="network", priority=PRIORITY_INPUT)
 
         # Start the countdown
         self.countdown(3)
 
-    def start_animation(self):
-        """Start the animation of the cars moving upward on the right canvas."""
-        for car in self.right_canvas.find_withtag("car"):
-            x1, y1 = self.right_canvas.coords(car)
-            self.right_canvas.move(car, 0, -10)  # Move the car up
+    def answer(self, player, index):
+        """
+        Answer for a player. In a networked match, any player's keys answer for this window's
+        player, and the answer is sent to the host to be scored.
+
+        Args:
+            player (Player): The player whose key was pressed.
+            index (int): The index of the answer.
+        """
+        if self.network is None:
+            player.check_answer(index)
+        elif self.network.player_index is not None and not self.match.winner:
+            self.network.send_answer(index)
+
+    def network_update(self, elapsed):
+        """
+        Apply the changes the host has sent since the last frame.
+
+        Args:
+            elapsed (float): The time in seconds since the last frame.
+
+        Returns:
+            bool: False once the match is over or the host has gone.
+        """
+        for delta in self.network.poll():
+            kind = delta[0]
+            if kind != "disconnected" and not 0 <= delta[1] < len(self.players):
+                continue  # Not a player in this window, so the host is out of step with us
+            if kind == "welcome":
+                player_count = delta[4]
+                if player_count != self.player_count:
+                    self.leave_network_match(f"The host's match is for {player_count} players, not {self.player_count}")
+                    return False
+            elif kind == "question":
+                kind, index, question, answers, correct_answer = delta
+                state = self.players[index].state
+                state.question, state.answers, state.correct_answer = question, answers, correct_answer
+                if not self.scheduler.is_registered("countdown"):
+                    self.players[index].show_question()
+            elif kind == "score":
+                kind, index, score = delta
+                player = self.players[index]
+                speed = CAR_UP_SPEED if score > player.score else CAR_DOWN_SPEED
+                player.state.score = score
+                player.car_tween.move_to(player.car_target_y(), speed)  # Move the car to the new score
+                self.view.set_text(player.score_label, f"Score: {score}")
+            elif kind == "win":
+                self.match.winner = self.winner = self.players[delta[1]].name
+                self.end_game()
+                return False
+            elif kind == "disconnected":
+                self.leave_network_match("Lost the connection to the host")
+                return False
+        return True
+
+    def leave_network_match(self, message):
+        """
+        Give up a networked match and go back to the difficulty screen.
 
-        if y1 > 700:
-            self.after(ANIMATION_DELAY, self.start_animation)  # Continue animation if necessary
+        Args:
+            message (str): The reason, shown on the difficulty screen.
+        """
+        self.network.leave()
+        self.racing = False
+        self.start_road()  # Let the road stop when idle again
+        self.scheduler.unregister("countdown")
+        for player in self.players:
+            player.car_tween.stop()
+            self.right_canvas.delete(player.player_car)
+        self.show_difficulty_selection()
+        self.show_status(message, "red")
+
+    def build_game_screen(self):
+        """
+        Build the game screen with every player and the countdown.
 
-    def clear_canvas_widgets(self):
-        """Remove all widgets from the left_canvas."""
-        for widget in self.left_canvas.winfo_children():
-            widget.destroy()
+        Players get a lane each, spread evenly around the middle of the road, and a frame
+        each, in one column for two players and two columns for more.
+
+        Returns:
+            list: The (widget, place options) pairs of the screen.
+        """
+        count = self.player_count
+        columns = 1 if count <= 2 else 2
+        rows = (count + columns - 1) // columns
+        frame_width = min(500, 600 // columns - 20)
+        frame_height = min(300, 700 // rows - 20)
+        lane_width = min(LANE_WIDTH, 200 / count)
+
+        screen = []
+        for index, (name, keys, car_image_file, car_side_image_file) in enumerate(PLAYER_CONFIGS[:count]):
+            lane_x = ROAD_CENTER_X + (index - (count - 1) / 2) * lane_width
+            player = Player(self, car_image_file, car_side_image_file, lane_x, CAR_START_Y, keys, name)
+            column, row = index % columns, index // columns
+            player.create_player_frame(600 // columns * (column + 0.5), 75 + 700 / rows * (row + 0.5), frame_width, frame_height)
+            self.players.append(player)
+
+            # Each of the player's keys answers with one of their answers
+            for answer_index, key in enumerate(keys):
+                self.answer_keys[key] = (player, answer_index)
+
+            screen.append((player.player_frame, {"x": player.frame_x, "y": player.frame_y, "anchor": tk.CENTER,
+                                                 "width": frame_width, "height": frame_height}))
+
+        # Create the countdown frame and label
+        self.countdown_frame = tk.Canvas(self.left_canvas, relief="solid", borderwidth=5)
+        self.countdown_label = tk.Label(self.countdown_frame, text="3", font=("Terminal", 200), foreground="Red")
+        self.countdown_label.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
+
+        screen.append((self.countdown_frame, {"x": 300, "y": 400, "anchor": tk.CENTER, "width": 500, "height": 700}))
+        return screen
 
     def load_carscroll(self):
         """Load the scrolling background and cars on the right canvas."""
@@ -538,76 +1502,144 @@ class Game(tk.Tk):
         self.right_closing_bar = self.right_canvas.create_rectangle(400, 0, 400, 800, fill="black", tags="closing_bar")
 
         # Create and place finish line off-screen
+        self.create_finish_line()
+
+    def create_finish_line(self):
+        """Create the checkered finish line above the top of the road."""
+        y = FINISH_LINE_Y  # Offset the finish line by 100
+        if self.road_rendering == "dash":
+            # Draw the whole finish line as one image item
+            if self.finish_line_image is None:
+                self.finish_line_image = self.bake_finish_line()
+            self.right_canvas.create_image(100, y, anchor=tk.NW, image=self.finish_line_image, tags="finish_line")
+            self.finish_line_y = y
+            return
+
         for i in range(0, 20):
             x = i * 10
-            y = -100  # Offset the finish line by 100
             if i % 2:
                 self.right_canvas.create_rectangle(100 + x, 0 + y, 110 + x, 10 + y, fill="white", tags="finish_line")
                 self.right_canvas.create_rectangle(100 + x, 10 + y, 110 + x, 20 + y, fill="black", tags="finish_line")
             else:
                 self.right_canvas.create_rectangle(100 + x, 0 + y, 110 + x, 10 + y, fill="black", tags="finish_line")
                 self.right_canvas.create_rectangle(100 + x, 10 + y, 110 + x, 20 + y, fill="white", tags="finish_line")
+        self.finish_line_y = y
+
+    def bake_finish_line(self):
+        """
+        Draw the checkered finish line into an image, so it can be shown as a single canvas item.
+
+        Returns:
+            tk.PhotoImage: The 200 by 20 pixel finish line.
+        """
+        image = tk.PhotoImage(width=200, height=20)
+        image.put("white", to=(0, 0, 200, 20))
+        for i in range(0, 20):
+            x = i * 10
+            # Black squares alternate between the top and bottom row
+            top = 10 if i % 2 else 0
+            image.put("black", to=(x, top, x + 10, top + 10))
+        return image
 
     def create_moving_lines(self):
         """Create the moving lines on the road."""
-        # Create lines with tags
-        for x in [150, 200, 250]:
-            for y in range(50, RESOLUTION[1] + 50, 100):
-                line_id = self.right_canvas.create_line(x, y, x, y + 50, fill="white", tags="moving_lines")
+        self.line_offset = 0.0
+        if self.road_rendering == "dash":
+            # One dashed line per lane, scrolled by changing where the dashes start
+            for x in [150, 200, 250]:
+                self.right_canvas.create_line(x, 0, x, RESOLUTION[1], fill="white",
+                                              dash=(50, LINE_SPACING - 50), dashoffset=0, tags="road_lanes")
+        else:
+            # Create lines with tags, starting one gap above the screen so the road is always covered
+            for x in [150, 200, 250]:
+                for y in range(50 - LINE_SPACING, RESOLUTION[1] + 50, LINE_SPACING):
+                    line_id = self.right_canvas.create_line(x, y, x, y + 50, fill="white", tags="moving_lines")
 
         # Start the movement of the lines
-        self.move_lines()
-
-    def move_lines(self):
-        """Move all lines with the tag 'moving_lines'."""
-        for line_id in self.right_canvas.find_withtag("moving_lines"):
-            x1, y1, x2, y2 = self.right_canvas.coords(line_id)
-            if y1 < RESOLUTION[1]:
-                self.right_canvas.move(line_id, 0, LINE_STEP)  # Move the line down
-            else:
-                # Reset the line's position to the top
-                self.right_canvas.coords(line_id, x1, 0, x2, 50)
-        
-        # Continue moving lines
-        self.after(ANIMATION_DELAY, self.move_lines)  # Update
+        self.start_road()
+
+    def start_road(self):
+        """
+        Register the road update, at the rate the quality level allows.
+
+        During a race the road keeps the frame clock awake; on the other screens it is ambient.
+        """
+        self.scheduler.register(self.move_lines, interval=self.road_interval, name="move_lines",
+                                ambient=not self.racing)
+
+    def move_lines(self, elapsed):
+        """
+        Move all lines with the tag 'moving_lines'.
+
+        The lines repeat every LINE_SPACING pixels, so once they have scrolled a whole gap
+        they are moved back by one gap, which looks the same as wrapping each line around.
+        With the 'dash' rendering the dashes are moved instead, by starting them further back.
+
+        Args:
+            elapsed (float): The time in seconds since the last frame.
+        """
+        move = LINE_SPEED * elapsed  # Move the lines down
+        self.line_offset += move
+        if self.line_offset >= LINE_SPACING:
+            wraps = self.line_offset // LINE_SPACING
+            self.line_offset -= wraps * LINE_SPACING
+            move -= wraps * LINE_SPACING  # Jump back to the top by whole gaps
+        if self.road_rendering == "dash":
+            # The lines are drawn downwards, so starting the dashes earlier moves them down
+            self.right_canvas.itemconfig("road_lanes", dashoffset=round(-self.line_offset) % LINE_SPACING)
+        else:
+            self.right_canvas.move("moving_lines", 0, move)  # Move every line at once
 
     def end_game(self):
         """Initiates the end sequence of the game."""
         self.game_running = False  # Set game_running flag to False
+        self.racing = False
+        self.start_road()  # Let the road stop when idle again
 
+        for player in self.players:
+            player.car_tween.stop()  # Leave the car where it is, for the NPCs to take over
         for car in self.right_canvas.find_withtag("car"):
-            self.right_canvas.addtag_withtag("npc", car)  # Tag car as 'npc'
-            self.right_canvas.dtag(car, "car")  # Remove 'car' tag
+            self.add_npc(car)  # Turn the player's car into an NPC
 
         self.end_game_animation()  # Start end game animation
 
-        # Clear previous widgets
-        self.clear_canvas_widgets()
+        # Load the winner's side car image and score
+        for player in self.players:
+            if player.name == self.winner:
+                winner = player
+
+        self.show_screen("end")  # Show the end game frame, building it the first time
 
-        # Create and place the end game frame
+        # Display the winner's name, score and side car image
+        self.winner_label.config(text=f"{self.winner} Won!")
+        self.score_label.config(text=f"Score: {winner.score}")
+        self.end_frame.itemconfig(self.winner_car, image=winner.car_side_image)
+
+        if self.save_replays and self.replay_log is not None:
+            # Save the replay in the background, named after when the match ended and its seed
+            file_name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.match.seed}.ttr"
+            path = os.path.join(REPLAY_DIRECTORY, file_name)
+            get_writer().submit(self.replay_log, path, self.replay_log.to_bytes())
+
+    def build_end_screen(self):
+        """
+        Build the end game screen.
+
+        Returns:
+            list: The (widget, place options) pairs of the screen.
+        """
+        # Create the end game frame
         self.end_frame = tk.Canvas(self.left_canvas, relief="solid", borderwidth=5)
-        self.end_frame.place(x=300, y=400, anchor=tk.CENTER, width=500, height=600)
 
-        # Display the winner's name
-        self.winner_label = tk.Label(self.end_frame, text=f"{self.winner} Won!", font=NORMAL_TEXT_FONT)
+        # Labels for the winner's name and score
+        self.winner_label = tk.Label(self.end_frame, text="", font=NORMAL_TEXT_FONT)
         self.winner_label.place(relx=0.5, rely=0.1, anchor=tk.CENTER)
 
-        # Load and display the winner's side car image
-        if self.winner == "Player 1":
-            winner_car_image_file = "cars/carside1.png"
-            score = self.player1.score
-        elif self.winner == "Player 2":
-            winner_car_image_file = "cars/carside2.png"
-            score = self.player2.score
-
-        self.score_label = tk.Label(self.end_frame, text=f"Score: {score}", font=NORMAL_TEXT_FONT)
+        self.score_label = tk.Label(self.end_frame, text="", font=NORMAL_TEXT_FONT)
         self.score_label.place(relx=0.5, rely=0.2, anchor=tk.CENTER)
 
-        winner_car_image = tk.PhotoImage(file=winner_car_image_file)
-        self.end_frame.create_image(150, 200, anchor=tk.NW, image=winner_car_image)
-
-        # Keep a reference to prevent garbage collection
-        self.end_frame.image = winner_car_image
+        # Winner's side car image, set when the game ends
+        self.winner_car = self.end_frame.create_image(150, 200, anchor=tk.NW)
 
         self.play_again_label = tk.Label(self.end_frame, text=f"Play Again?", font=NORMAL_TEXT_FONT)
         self.play_again_label.place(relx=0.5, rely=0.6, anchor=tk.CENTER)
@@ -618,46 +1650,144 @@ class Game(tk.Tk):
         self.no_button = tk.Button(self.end_frame, text="No", font=NORMAL_TEXT_FONT, command=lambda: self.destroy())
         self.no_button.place(relx=0.6, rely=0.7, anchor=tk.CENTER)
 
+        return [(self.end_frame, {"x": 300, "y": 400, "anchor": tk.CENTER, "width": 500, "height": 600})]
+
+    def destroy(self):
+        """Destroy the game window, release the images it was using and finish saving accounts."""
+        if self.idle_report:
+            self.scheduler.idle_report()
+        if self.input_report:
+            self.input_queue.report()
+        if self.network is not None:
+            self.network.close()
+        for file in list(assets.images):
+            assets.release(file)  # Nothing is left on screen to use the image
+        accounts.close()  # Wait for queued account writes before the window goes away
+        super().destroy()
+
     def end_game_animation(self):
         """Initiates the end sequence animation of the game."""
         # Ensure we don't create multiple animations
         self.right_canvas.delete("finish_line")
+        if self.quality_level >= 3:
+            return  # The finish line is left out at the lowest quality
 
         # Recreate finish line for animation
-        for i in range(0, 20):
-            x = i * 10
-            y = -100  # Offset the finish line by 100
-            if i % 2:
-                self.right_canvas.create_rectangle(100 + x, 0 + y, 110 + x, 10 + y, fill="white", tags="finish_line")
-                self.right_canvas.create_rectangle(100 + x, 10 + y, 110 + x, 20 + y, fill="black", tags="finish_line")
-            else:
-                self.right_canvas.create_rectangle(100 + x, 0 + y, 110 + x, 10 + y, fill="black", tags="finish_line")
-                self.right_canvas.create_rectangle(100 + x, 10 + y, 110 + x, 20 + y, fill="white", tags="finish_line")
+        self.create_finish_line()
 
         self.move_amount = 10
-        self.animate_finish_line()
-
-    def animate_finish_line(self):
-        """Animate the finish line moving up."""
-        for square_id in self.right_canvas.find_withtag("finish_line"):
-            x1, y1, x2, y2 = self.right_canvas.coords(square_id)
-            if y1 < RESOLUTION[1]:  # Continue animation if not reached end
-                self.right_canvas.move(square_id, 0, LINE_STEP)
-            else:
-                self.right_canvas.delete(square_id)  # Remove the finish line if it reaches the end
+        self.scheduler.register(self.animate_finish_line, name="animate_finish_line")
 
-        if self.right_canvas.find_withtag("finish_line"):
-            self.after(ANIMATION_DELAY, self.animate_finish_line)  # Continue animation if finish lines remain
+    def animate_finish_line(self, elapsed):
+        """
+        Animate the finish line moving up.
+
+        Args:
+            elapsed (float): The time in seconds since the last frame.
+        """
+        if self.finish_line_y < RESOLUTION[1]:  # Continue animation if not reached end
+            move = LINE_SPEED * elapsed
+            self.right_canvas.move("finish_line", 0, move)  # Move every square at once
+            self.finish_line_y += move
+            return True
+
+        self.right_canvas.delete("finish_line")  # Remove the finish line once it reaches the end
+        return False
+
+    def apply_quality(self, level):
+        """
+        Change how much eye candy is drawn. Called by the quality governor.
+
+        Level 1 halves the NPC cars, level 2 also updates the road less often, and level 3
+        also drops the NPC cars and the finish line.
+
+        Args:
+            level (int): The quality level, 0 being the best.
+        """
+        self.quality_level = level
+        if level >= 3:
+            self.npc_pool_size = 0
+        elif level >= 1:
+            self.npc_pool_size = self.full_npc_pool_size // 2
+        else:
+            self.npc_pool_size = self.full_npc_pool_size
 
-    def npc_movement(self):
-        """Move non-player cars (NPCs) up and reset their position if they move off-screen."""
-        for val, car in enumerate(self.right_canvas.find_withtag("npc")):
-            self.right_canvas.move(car, 0, -10)  # Move the car up
-            x1, y1 = self.right_canvas.coords(car)
-            if y1 == -2000:
-                self.right_canvas.coords(car, random.choice([125, 275]), 900)  # Reset position
+        self.road_interval = LOW_QUALITY_ROAD_INTERVAL if level >= 2 else 0
+        if self.scheduler.is_registered("move_lines"):
+            self.start_road()
 
-        self.after(ANIMATION_DELAY, self.npc_movement)  # Continue NPC movement
+        if level >= 3:
+            self.scheduler.unregister("animate_finish_line")
+            self.right_canvas.delete("finish_line")
 
-# Create and start the game
-game = Game()
\ No newline at end of file
+    def add_npc(self, car):
+        """
+        Add a car to the NPC pool.
+
+        The pool may go over npc_pool_size for a while; extra cars are deleted once
+        they drive off-screen instead of being recycled.
+
+        Args:
+            car (int): The canvas item id of the car.
+        """
+        self.right_canvas.addtag_withtag("npc", car)  # Tag car as 'npc'
+        self.right_canvas.dtag(car, "car")  # Remove 'car' tag
+        self.npc_cars.append(car)
+        self.npc_y.append(self.right_canvas.coords(car)[1])  # Read the position once, when the car joins
+
+    def npc_movement(self, elapsed):
+        """
+        Move non-player cars (NPCs) up and recycle or remove them once they move off-screen.
+
+        Args:
+            elapsed (float): The time in seconds since the last frame.
+        """
+        move = CAR_DRIVE_SPEED * elapsed
+        self.right_canvas.move("npc", 0, -move)  # Move every NPC up at once
+
+        # Go backwards so cars can be removed while checking the rest
+        for index in range(len(self.npc_cars) - 1, -1, -1):
+            self.npc_y[index] -= move
+            if self.npc_y[index] > NPC_RECYCLE_Y:
+                continue  # Still on its way up
+
+            car = self.npc_cars[index]
+            if len(self.npc_cars) > self.npc_pool_size:
+                # The pool is over its cap, so delete the car instead of recycling it
+                del self.npc_cars[index]
+                del self.npc_y[index]
+                self.right_canvas.delete(car)
+            else:
+                self.right_canvas.coords(car, random.choice(NPC_LANES), NPC_RESPAWN_Y)  # Reset position
+                self.npc_y[index] = NPC_RESPAWN_Y
+
+startup_timer.mark("import")
+
+if __name__ == "__main__":
+    # Create and start the game
+    player_count = PLAYER_COUNT
+    seed = None
+    network = None
+    match_id = 0
+    for argument in sys.argv[1:]:
+        if argument.startswith("--match="):
+            match_id = int(argument[len("--match="):])  # Networked match to join, such as --match=3
+    for argument in sys.argv[1:]:
+        if argument.startswith("--players="):
+            player_count = int(argument[len("--players="):])  # Number of players, such as --players=4
+        elif argument.startswith("--seed="):
+            seed = int(argument[len("--seed="):])  # Seed every match uses, such as --seed=42
+        elif argument == "--host" or argument.startswith("--host="):
+            # Host networked matches, playing in this window over a loopback connection
+            host = NetplayHost(int(argument[len("--host="):]) if "=" in argument else DEFAULT_PORT)
+            host.start()
+            network = LoopbackClient(host, match_id)
+        elif argument.startswith("--join="):
+            # Join a networked match hosted on another machine, such as --join=192.168.1.20:50512
+            address, _, port = argument[len("--join="):].partition(":")
+            network = NetClient(address, int(port or DEFAULT_PORT), match_id)
+
+    game = Game(startup_report="--startup-report" in sys.argv, idle_report="--idle-report" in sys.argv,
+                player_count=player_count, input_report="--input-report" in sys.argv, seed=seed,
+                save_replays="--save-replays" in sys.argv, network=network)
+    game.mainloop()  # Start the main event loop
\ No newline at end of file